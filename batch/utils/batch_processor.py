@@ -8,6 +8,7 @@ import gc
 from batch.utils.settings_check import check_settings
 from batch.utils.video_processor import process_video
 from core.utils.config_utils import load_key, update_key
+from core.utils.llm_cache import print_cache_stats
 import pandas as pd
 from rich.console import Console
 from rich.panel import Panel
@@ -16,22 +17,31 @@ import shutil
 
 console = Console()
 
-def record_and_update_config(source_language, target_language):
+def record_and_update_config(source_language, target_language, single_pass=None):
     original_source_lang = load_key('whisper.language')
     original_target_lang = load_key('target_language')
+    original_single_pass = load_key('single_pass_translate')
     
     if source_language and not pd.isna(source_language):
         update_key('whisper.language', source_language)
     if target_language and not pd.isna(target_language):
         update_key('target_language', target_language)
+    if single_pass is not None and not pd.isna(single_pass):
+        update_key('single_pass_translate', bool(int(single_pass)))
     
-    return original_source_lang, original_target_lang
+    return original_source_lang, original_target_lang, original_single_pass
 
 def process_batch():
     if not check_settings():
         raise Exception("Settings check failed")
 
     df = pd.read_csv('batch/tasks_setting.csv')
+
+    # load the spaCy models of every source language once, before the first video
+    from core.spacy_utils import preload_nlp
+    pending = df[df['Status'].isna() | df['Status'].astype(str).str.contains('Error')]
+    preload_nlp([load_key('whisper.language') if pd.isna(lang) else lang for lang in pending['Source Language']])
+
     for index, row in df.iterrows():
         if pd.isna(row['Status']) or 'Error' in str(row['Status']):
             total_tasks = len(df)
@@ -71,8 +81,9 @@ def process_batch():
             
             source_language = row['Source Language']
             target_language = row['Target Language']
+            single_pass = row.get('Single Pass')  # optional column, older task sheets lack it
             
-            original_source_lang, original_target_lang = record_and_update_config(source_language, target_language)
+            original_source_lang, original_target_lang, original_single_pass = record_and_update_config(source_language, target_language, single_pass)
             
             try:
                 dubbing = 0 if pd.isna(row['Dubbing']) else int(row['Dubbing'])
@@ -85,6 +96,7 @@ def process_batch():
             finally:
                 update_key('whisper.language', original_source_lang)
                 update_key('target_language', original_target_lang)
+                update_key('single_pass_translate', original_single_pass)
 
                 df.at[index, 'Status'] = status_msg
                 df.to_csv('batch/tasks_setting.csv', index=False, encoding='utf-8-sig')
@@ -95,6 +107,7 @@ def process_batch():
         else:
             print(f"Skipping task: {row['Video File']} - Status: {row['Status']}")
 
+    print_cache_stats()
     console.print(Panel("All tasks processed!\nCheck out in `batch/output`!", 
                        title="[bold green]Batch Processing Complete", expand=False))
 
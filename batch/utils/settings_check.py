@@ -7,6 +7,7 @@ from rich.panel import Panel
 SETTINGS_FILE = 'batch/tasks_setting.csv'
 INPUT_FOLDER = os.path.join('batch', 'input')
 VALID_DUBBING_VALUES = [0, 1]
+VALID_SINGLE_PASS_VALUES = [0, 1]
 
 console = Console()
 
@@ -47,6 +48,12 @@ def check_settings():
                 console.print(Panel(f"Invalid dubbing value 「{dubbing}」", title=f"[bold red]Error in row {index + 2}", expand=False))
                 all_passed = False
 
+        single_pass = row.get('Single Pass')
+        if not pd.isna(single_pass):
+            if int(single_pass) not in VALID_SINGLE_PASS_VALUES:
+                console.print(Panel(f"Invalid single pass value 「{single_pass}」", title=f"[bold red]Error in row {index + 2}", expand=False))
+                all_passed = False
+
     if all_passed:
         console.print(Panel(f"✅ All settings passed the check!\nDetected {local_video_tasks} local video tasks and {url_tasks} URL tasks.", title="[bold green]Success", expand=False))
 
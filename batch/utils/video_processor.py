@@ -7,6 +7,7 @@ from functools import partial
 from rich.panel import Panel
 from rich.console import Console
 from core import *
+from core.utils.llm_metrics import print_llm_metrics
 
 console = Console()
 
@@ -22,7 +23,7 @@ def process_video(file, dubbing=False, is_retry=False):
     
     text_steps = [
         ("🎥 Processing input file", partial(process_input_file, file)),
-        ("🎙️ Transcribing with Whisper", partial(_2_asr.transcribe)),
+        ("🎙️ Transcribing with Whisper", _2_asr.transcribe),
         ("✂️ Splitting sentences", split_sentences),
         ("📝 Summarizing and translating", summarize_and_translate),
         ("⚡ Processing and aligning subtitles", process_and_align_subtitles),
@@ -60,6 +61,7 @@ def process_video(file, dubbing=False, is_retry=False):
                         border_style="red"
                     )
                     console.print(error_panel)
+                    print_llm_metrics()
                     cleanup(ERROR_OUTPUT_DIR)
                     return False, current_step, str(e)
                 console.print(Panel(
@@ -68,6 +70,7 @@ def process_video(file, dubbing=False, is_retry=False):
                 ))
     
     console.print(Panel("[bold green]All steps completed successfully! 🎉[/]", border_style="green"))
+    print_llm_metrics()
     cleanup(SAVE_DIR)
     return True, "", ""
 
@@ -89,11 +92,15 @@ def process_input_file(file):
 
 def split_sentences():
     _3_1_split_nlp.split_by_spacy()
-    _3_2_split_meaning.split_sentences_by_meaning()
+    if not load_key("stream_translate"):  # streaming mode splits by meaning while translating
+        _3_2_split_meaning.split_sentences_by_meaning()
 
 def summarize_and_translate():
     _4_1_summarize.get_summary()
-    _4_2_translate.translate_all()
+    if load_key("stream_translate"):
+        _4_2_translate.translate_all_streaming()
+    else:
+        _4_2_translate.translate_all()
 
 def process_and_align_subtitles():
     _5_split_sub.split_for_sub_main()
@@ -1,29 +1,146 @@
+import os
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from core.utils import *
 from core.utils.vocal_separator import separate_vocals_and_background
 from core.asr_backend.audio_preprocess import process_transcription, convert_video_to_audio, split_audio, save_results, normalize_audio_volume
 from core._1_ytdlp import find_video_files
 from core.utils.models import *
 
+# Rough resident memory of one worker holding a whisper + align model on CPU
+ASR_WORKER_RAM_GB = 4
+
+def get_asr_workers(num_segments):
+    """Number of ASR worker processes, bounded by config, segment count and physical RAM"""
+    workers = min(load_key("whisper.asr_workers"), num_segments)
+    import torch
+    if torch.cuda.is_available():
+        return 1  # one GPU, concurrent models would just fight over its memory
+    try:
+        ram_gb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / (1024**3)
+        workers = min(workers, max(1, int(ram_gb // ASR_WORKER_RAM_GB)))
+    except (ValueError, OSError, AttributeError):
+        pass  # sysconf is not available on Windows
+    return max(1, workers)
+
+# ------------
+# per-segment checkpoints
+# ------------
+
+def _file_fingerprint(path, sample_bytes=1 << 20):
+    """Cheap content hash: file size plus head, middle and tail samples"""
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        for pos in (0, size // 2, max(0, size - sample_bytes)):
+            f.seek(pos)
+            h.update(f.read(sample_bytes))
+    return h.hexdigest()
+
+def _checkpoint_key(raw_audio):
+    """Key checkpoints by the audio content and every setting that changes the transcription"""
+    # vocal.wav is derived from raw.wav and re-normalized on every run, so key on the separator setting instead of its bytes.
+    # whisper.language is left out: transcribe overwrites `auto` with the detected language, each checkpoint stores the requested one
+    settings = [_file_fingerprint(raw_audio), load_key("audio_separator"), load_key("whisper.model")]
+    if load_key("whisper.hotwords_enabled"):
+        settings.append(load_key("whisper.hotwords"))
+    return hashlib.sha1(json.dumps(settings).encode()).hexdigest()[:16]
+
+def _checkpoint_path(key, start, end):
+    return os.path.join(_AUDIO_ASR_CHECKPOINT_DIR, f"{key}_{start:.3f}_{end:.3f}.json")
+
+def _load_checkpoint(key, start, end, language):
+    path = _checkpoint_path(key, start, end)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+    except ValueError:
+        return None  # torn write from a crash, redo the segment
+    requested = result.get('requested_language')
+    # still valid if the setting is unchanged, or is `auto` replaced by the language it detected
+    if language == requested or ('auto' in str(requested) and language == result['language']):
+        return result
+    return None
+
+def _save_checkpoint(key, start, end, result, requested_language):
+    os.makedirs(_AUDIO_ASR_CHECKPOINT_DIR, exist_ok=True)
+    path = _checkpoint_path(key, start, end)
+    result['requested_language'] = requested_language
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, default=float)  # numpy scalars -> float
+    os.replace(path + '.tmp', path)
+
 @check_file_exists(_2_CLEANED_CHUNKS)
 def transcribe():
     video_file = find_video_files()
     convert_video_to_audio(video_file)
+    segments = split_audio(_RAW_AUDIO_FILE)
+
+    # reuse segments finished by a previous (crashed) run
+    key = _checkpoint_key(_RAW_AUDIO_FILE)
+    all_results = [_load_checkpoint(key, start, end, load_key("whisper.language")) for start, end in segments]
+    pending = [i for i, result in enumerate(all_results) if result is None]
+    # the language asked for before any detection overwrote it, kept across resumes
+    requested_language = next((result['requested_language'] for result in all_results if result), load_key("whisper.language"))
+    if len(pending) < len(segments):
+        rprint(f"[green]♻️ Reusing {len(segments) - len(pending)}/{len(segments)} transcribed segments from checkpoints[/green]")
+        if 'auto' in load_key("whisper.language"):
+            # restore the language detected before the restart, remaining segments are transcribed in it
+            update_key("whisper.language", next(result['language'] for result in all_results if result))
 
-    if load_key("audio_separator"):
+    # separation feeds the pending segments and later dubbing, a fully checkpointed resume with its outputs can skip it
+    if load_key("audio_separator") and (pending or not (os.path.exists(_VOCAL_AUDIO_FILE) and os.path.exists(_BACKGROUND_AUDIO_FILE))):
         separate_vocals_and_background()
         vocal_audio = normalize_audio_volume(_VOCAL_AUDIO_FILE, _VOCAL_AUDIO_FILE)
     else:
-        vocal_audio = _RAW_AUDIO_FILE
+        vocal_audio = _VOCAL_AUDIO_FILE if load_key("audio_separator") else _RAW_AUDIO_FILE
 
-    segments = split_audio(_RAW_AUDIO_FILE)
-
-    all_results = []
-    from core.asr_backend.whisperX_local import transcribe_audio as ts
+    from core.asr_backend.whisperX_local import transcribe_audio as ts, release_session
     rprint("[cyan]🎤 Transcribing audio with local model...[/cyan]")
 
-    for start, end in segments:
-        result = ts(_RAW_AUDIO_FILE, vocal_audio, start, end)
-        all_results.append(result)
+    workers = get_asr_workers(len(pending)) if pending else 1
+    if workers > 1:
+        rprint(f"[cyan]🧵 Transcribing {len(pending)} segments with {workers} worker processes[/cyan]")
+        # each worker process keeps its own loaded model for all segments it handles
+        errors = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            # all workers must transcribe in one language: a fixed setting, a reused checkpoint's, or the first segment's detection
+            language = load_key("whisper.language")
+            if 'auto' in language:
+                done = [result for result in all_results if result is not None]
+                if done:
+                    language = done[0]['language']
+                else:
+                    first = pending.pop(0)
+                    all_results[first] = executor.submit(ts, _RAW_AUDIO_FILE, vocal_audio, *segments[first]).result()
+                    _save_checkpoint(key, *segments[first], all_results[first], requested_language)
+                    language = all_results[first]['language']
+                rprint(f"[cyan]🌐 Transcribing all segments as `{language}`[/cyan]")
+            futures = {executor.submit(ts, _RAW_AUDIO_FILE, vocal_audio, *segments[i], language): i for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    all_results[i] = future.result()
+                except Exception as e:
+                    errors.append(e)  # keep checkpointing the other segments
+                    continue
+                _save_checkpoint(key, *segments[i], all_results[i], requested_language)
+        if errors:
+            raise errors[0]
+        update_key("whisper.language", language)
+    else:
+        for i in pending:
+            start, end = segments[i]
+            all_results[i] = ts(_RAW_AUDIO_FILE, vocal_audio, start, end)
+            _save_checkpoint(key, start, end, all_results[i], requested_language)
+            # Save language, later segments reuse the detected one
+            update_key("whisper.language", all_results[i]['language'])
+    # free VRAM before translation and dubbing, the models stay loaded only across this video's segments
+    release_session()
 
     combined_result = {'segments': []}
     for result in all_results:
@@ -33,4 +150,4 @@ def transcribe():
     save_results(df)
         
 if __name__ == "__main__":
-    transcribe()
\ No newline at end of file
+    transcribe()
@@ -1,38 +1,100 @@
+import bisect
+import itertools
+import collections
+import threading
 import concurrent.futures
 from difflib import SequenceMatcher
 import math
 from core.prompts import get_split_prompt
-from core.spacy_utils.load_nlp_model import init_nlp
+from core.spacy_utils.load_nlp_model import init_nlp, pipe_docs, TOKENIZE_DISABLE
 from core.utils import *
 from rich.console import Console
 from rich.table import Table
 from core.utils.models import _3_1_SPLIT_BY_NLP, _3_2_SPLIT_BY_MEANING
+from core.utils.rate_limiter import get_llm_workers
 console = Console()
 
-def tokenize_sentence(sentence, nlp):
-    doc = nlp(sentence)
-    return [token.text for token in doc]
-
-def find_split_positions(original, modified):
+def count_spacy_tokens(sentences, nlp):
+    """Token count of each sentence, tokenized in one batched stream"""
+    return [len(doc) for doc in pipe_docs(nlp, sentences, disable=TOKENIZE_DISABLE)]
+
+def _normalize_with_index(text):
+    """Lowercased alphanumeric chars of `text` and the index of each one in `text`"""
+    chars, index = [], []
+    for i, char in enumerate(text):
+        if char.isalnum():
+            chars.append(char.lower())
+            index.append(i)
+    return ''.join(chars), index
+
+def _locate_part_end(norm_original, norm_part, expected):
+    """Position in `norm_original` where `norm_part` most likely ends, searching around `expected`"""
+    window = max(20, len(norm_part))
+    for size in (12, 6, 3):
+        tail = norm_part[-size:]
+        if not tail:
+            break
+        lo = max(0, expected - window - len(tail))
+        hi = min(len(norm_original), expected + window)
+        ends, pos = [], norm_original.find(tail, lo, hi)
+        while pos != -1:
+            ends.append(pos + len(tail))
+            pos = norm_original.find(tail, pos + 1, hi)
+        if ends:
+            return min(ends, key=lambda end: abs(end - expected))
+    return min(expected, len(norm_original))
+
+def find_split_positions(original, modified, joiner=None):
+    """
+    Find where to cut `original` so it matches the `[br]`-separated parts of `modified`.
+
+    Anchors each part's end by matching normalized text (alphanumerics only) near its
+    expected offset and scores a band of cut points around that anchor and around the
+    length-based guess, widening up to 4x while a cut point outside could still beat the
+    best ratio (SequenceMatcher's cheap length bound). The result equals the old exhaustive
+    search unless its best cut lies more than 4 bands from both; at most ~16 bands of cut
+    points are scored per part, so the worst case is linear in the part length times the
+    cost of one ratio, where the old search scored every index.
+    """
     split_positions = []
     parts = modified.split('[br]')
     start = 0
-    language = load_key("whisper.language")
-    joiner = get_joiner(language)
+    if joiner is None:
+        joiner = get_joiner(load_key("whisper.language"))
+    norm_original, original_index = _normalize_with_index(original)
 
     for i in range(len(parts) - 1):
-        max_similarity = 0
-        best_split = None
+        modified_left = joiner.join(parts[i].split())
+        norm_part, _ = _normalize_with_index(modified_left)
 
-        for j in range(start, len(original)):
-            original_left = original[start:j]
-            modified_left = joiner.join(parts[i].split())
+        # re-sync on the actual cut so errors in one part don't drift into the next
+        norm_start = bisect.bisect_left(original_index, start)
+        anchor = _locate_part_end(norm_original, norm_part, norm_start + len(norm_part))
+        candidate = original_index[anchor - 1] + 1 if anchor > norm_start else start
 
-            left_similarity = SequenceMatcher(None, original_left, modified_left).ratio()
-
-            if left_similarity > max_similarity:
-                max_similarity = left_similarity
-                best_split = j
+        max_similarity = 0
+        best_split = None
+        band = 8 + len(modified_left) // 10
+        matcher = SequenceMatcher(None, '', modified_left)  # b side is indexed once for every cut point
+        # the exhaustive search keeps the first best cut, so an earlier cut point also wins a tie
+        beats = lambda ratio, j: ratio > max_similarity or (ratio == max_similarity and best_split is not None and j < best_split)
+        length_bound = lambda j: 2.0 * min(j - start, len(modified_left)) / (j - start + len(modified_left)) if j - start + len(modified_left) else 1.0
+        # widen around the anchor and around the length-based guess, in case the anchor hit a repeated phrase
+        centers, scored = {candidate, start + len(modified_left)}, set()
+        for width in (band, band * 2, band * 4):
+            for j in sorted(j for center in centers for j in range(max(start, center - width), min(len(original), center + width + 1)) if j not in scored):
+                scored.add(j)
+                if not beats(length_bound(j), j):
+                    continue
+                matcher.set_seq1(original[start:j])
+                if not beats(matcher.quick_ratio(), j):
+                    continue
+                left_similarity = matcher.ratio()
+                if beats(left_similarity, j):
+                    max_similarity = left_similarity
+                    best_split = j
+            if not any(beats(length_bound(j), j) for j in range(start, len(original)) if j not in scored):
+                break  # nothing left can win, the search is exact
 
         if max_similarity < 0.9:
             console.print(f"[yellow]Warning: low similarity found at the best split point: {max_similarity}[/yellow]")
@@ -79,32 +141,33 @@ def split_sentence(sentence, num_parts, word_limit=20, index=-1, retry_attempt=0
     
     return best_split
 
-def parallel_split_sentences(sentences, max_length, max_workers, nlp, retry_attempt=0):
-    """Split sentences in parallel using a thread pool."""
-    new_sentences = [None] * len(sentences)
-    futures = []
+def _sentence_state(text, num_tokens, max_length):
+    return {"text": text, "tokens": num_tokens, "done": num_tokens <= max_length}
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for index, sentence in enumerate(sentences):
-            # Use tokenizer to split the sentence
-            tokens = tokenize_sentence(sentence, nlp)
-            # print("Tokenization result:", tokens)
-            num_parts = math.ceil(len(tokens) / max_length)
-            if len(tokens) > max_length:
-                future = executor.submit(split_sentence, sentence, num_parts, max_length, index=index, retry_attempt=retry_attempt)
-                futures.append((future, index, num_parts, sentence))
-            else:
-                new_sentences[index] = [sentence]
+def parallel_split_sentences(states, max_length, max_workers, nlp, retry_attempt=0):
+    """Split the sentences that are still too long in parallel using a thread pool, return the updated sentence states."""
+    new_states = [[state] for state in states]
+    split_lines = {}
 
-        for future, index, num_parts, sentence in futures:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for index, state in enumerate(states):
+            if not state["done"]:
+                num_parts = math.ceil(state["tokens"] / max_length)
+                future = executor.submit(split_sentence, state["text"], num_parts, max_length, index=index, retry_attempt=retry_attempt)
+                futures.append((future, index))
+
+        for future, index in futures:
             split_result = future.result()
             if split_result:
-                split_lines = split_result.strip().split('\n')
-                new_sentences[index] = [line.strip() for line in split_lines]
-            else:
-                new_sentences[index] = [sentence]
+                split_lines[index] = [line.strip() for line in split_result.strip().split('\n')]
+
+    # only the freshly split parts need tokenizing, all in one batch
+    token_counts = iter(count_spacy_tokens([line for lines in split_lines.values() for line in lines], nlp))
+    for index, lines in split_lines.items():
+        new_states[index] = [_sentence_state(line, next(token_counts), max_length) for line in lines]
 
-    return [sentence for sublist in new_sentences for sentence in sublist]
+    return [state for sublist in new_states for state in sublist]
 
 @check_file_exists(_3_2_SPLIT_BY_MEANING)
 def split_sentences_by_meaning():
@@ -114,15 +177,64 @@ def split_sentences_by_meaning():
         sentences = [line.strip() for line in f.readlines()]
 
     nlp = init_nlp()
-    # 🔄 process sentences multiple times to ensure all are split
+    max_length = load_key("max_split_length")
+    states = [_sentence_state(sentence, num_tokens, max_length) for sentence, num_tokens in zip(sentences, count_spacy_tokens(sentences, nlp))]
+    # 🔄 process sentences multiple times to ensure all are split, later passes only revisit unresolved ones
     for retry_attempt in range(3):
-        sentences = parallel_split_sentences(sentences, max_length=load_key("max_split_length"), max_workers=load_key("max_workers"), nlp=nlp, retry_attempt=retry_attempt)
+        if all(state["done"] for state in states):
+            break
+        states = parallel_split_sentences(states, max_length=max_length, max_workers=get_llm_workers(), nlp=nlp, retry_attempt=retry_attempt)
+    save_split_sentences([state["text"] for state in states])
 
+def save_split_sentences(sentences):
     # 💾 save results
     with open(_3_2_SPLIT_BY_MEANING, 'w', encoding='utf-8') as f:
         f.write('\n'.join(sentences))
     console.print('[green]✅ All sentences have been successfully split![/green]')
 
+# ------------
+# streaming mode
+# ------------
+
+def _resolve_sentence(text, num_tokens, max_length, nlp, lock):
+    """Split one sentence until every part fits, with the same 3 attempts as the batch passes"""
+    states = [_sentence_state(text, num_tokens, max_length)]
+    for retry_attempt in range(3):
+        if all(state["done"] for state in states):
+            break
+        next_states = []
+        for state in states:
+            if state["done"]:
+                next_states.append(state)
+                continue
+            split_result = split_sentence(state["text"], math.ceil(state["tokens"] / max_length), max_length, retry_attempt=retry_attempt)
+            lines = [line.strip() for line in split_result.strip().split('\n')] if split_result else [state["text"]]
+            with lock:  # the tokenizer is shared by all worker threads
+                next_states.extend(_sentence_state(line, len(nlp.make_doc(line)), max_length) for line in lines)
+        states = next_states
+    return [state["text"] for state in states]
+
+def iter_split_sentences_by_meaning(sentences, nlp):
+    """Yield split sentences in order, each as soon as it and everything before it is final"""
+    max_length = load_key("max_split_length")
+    max_workers = get_llm_workers()
+    lock = threading.Lock()
+    pending = collections.deque()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for sentence, num_tokens in zip(sentences, count_spacy_tokens(sentences, nlp)):
+            if num_tokens > max_length:
+                pending.append(executor.submit(_resolve_sentence, sentence, num_tokens, max_length, nlp, lock))
+            else:
+                pending.append([sentence])
+            # hand out the finished head, block only to keep the look-ahead bounded
+            while pending and (isinstance(pending[0], list) or pending[0].done() or len(pending) > max_workers * 4):
+                head = pending.popleft()
+                yield from (head if isinstance(head, list) else head.result())
+        while pending:
+            head = pending.popleft()
+            yield from (head if isinstance(head, list) else head.result())
+
 if __name__ == '__main__':
     # print(split_sentence('Which makes no sense to the... average guy who always pushes the character creation slider all the way to the right.', 2, 22))
     split_sentences_by_meaning()
\ No newline at end of file
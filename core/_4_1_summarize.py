@@ -1,30 +1,38 @@
+import os
 import json
 from core.prompts import get_summary_prompt
 import pandas as pd
 from core.utils import *
-from core.utils.models import _3_2_SPLIT_BY_MEANING, _4_1_TERMINOLOGY
+from core.utils.term_matcher import TermMatcher
+from core.utils.models import _3_1_SPLIT_BY_NLP, _3_2_SPLIT_BY_MEANING, _4_1_TERMINOLOGY
 
 CUSTOM_TERMS_PATH = 'custom_terms.csv'
 
 def combine_chunks():
     """Combine the text chunks identified by whisper into a single long text"""
-    with open(_3_2_SPLIT_BY_MEANING, 'r', encoding='utf-8') as file:
+    # in streaming mode the meaning split runs later, the nlp split holds the same text
+    source = _3_2_SPLIT_BY_MEANING if os.path.exists(_3_2_SPLIT_BY_MEANING) else _3_1_SPLIT_BY_NLP
+    with open(source, 'r', encoding='utf-8') as file:
         sentences = file.readlines()
     cleaned_sentences = [line.strip() for line in sentences]
     combined_text = ' '.join(cleaned_sentences)
     return combined_text[:load_key('summary_length')]  #! Return only the first x characters
 
-def search_things_to_note_in_prompt(sentence):
-    """Search for terms to note in the given sentence"""
+def load_terminology():
+    """Load the terminology once and compile its source terms into a matcher reusable across chunks"""
     with open(_4_1_TERMINOLOGY, 'r', encoding='utf-8') as file:
-        things_to_note = json.load(file)
-    things_to_note_list = [term['src'] for term in things_to_note['terms'] if term['src'].lower() in sentence.lower()]
-    if things_to_note_list:
+        terms = json.load(file)['terms']
+    return terms, TermMatcher([term['src'] for term in terms])
+
+def search_things_to_note_in_prompt(sentence, terminology=None):
+    """Search for terms to note in the given sentence"""
+    terms, matcher = terminology or load_terminology()
+    matched = sorted(matcher.find(sentence))
+    if matched:
         prompt = '\n'.join(
-            f'{i+1}. "{term["src"]}": "{term["tgt"]}",'
-            f' meaning: {term["note"]}'
-            for i, term in enumerate(things_to_note['terms'])
-            if term['src'] in things_to_note_list
+            f'{i+1}. "{terms[i]["src"]}": "{terms[i]["tgt"]}",'
+            f' meaning: {terms[i]["note"]}'
+            for i in matched
         )
         return prompt
     else:
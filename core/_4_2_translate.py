@@ -1,11 +1,21 @@
 import pandas as pd
 import json
+import os
+import sys
+import time
+import random
+import queue
+import threading
 import concurrent.futures
 from core.translate_lines import translate_lines
-from core._4_1_summarize import search_things_to_note_in_prompt
+from core._4_1_summarize import search_things_to_note_in_prompt, load_terminology
+from core._3_2_split_meaning import iter_split_sentences_by_meaning, save_split_sentences
+from core.spacy_utils.load_nlp_model import init_nlp
 from core._8_1_audio_task import check_len_then_trim
 from core._6_gen_sub import align_timestamp
 from core.utils import *
+from core.utils.token_counter import count_tokens
+from core.utils.rate_limiter import get_llm_workers
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from difflib import SequenceMatcher
@@ -13,24 +23,25 @@ from core.utils.models import *
 console = Console()
 
 # Function to split text into chunks
-def split_chunks_by_chars(chunk_size, max_i): 
-    """Split text into chunks based on character count, return a list of multi-line text chunks"""
-    with open(_3_2_SPLIT_BY_MEANING, "r", encoding="utf-8") as file:
-        sentences = file.read().strip().split('\n')
-
-    chunks = []
+def iter_chunks(sentences, chunk_size, max_i):
+    """Group sentences into multi-line chunks by character count, yielding each chunk as soon as it is closed"""
     chunk = ''
     sentence_count = 0
     for sentence in sentences:
         if len(chunk) + len(sentence + '\n') > chunk_size or sentence_count == max_i:
-            chunks.append(chunk.strip())
+            yield chunk.strip()
             chunk = sentence + '\n'
             sentence_count = 1
         else:
             chunk += sentence + '\n'
             sentence_count += 1
-    chunks.append(chunk.strip())
-    return chunks
+    yield chunk.strip()
+
+def split_chunks_by_chars(chunk_size, max_i): 
+    """Split text into chunks based on character count, return a list of multi-line text chunks"""
+    with open(_3_2_SPLIT_BY_MEANING, "r", encoding="utf-8") as file:
+        sentences = file.read().strip().split('\n')
+    return list(iter_chunks(sentences, chunk_size, max_i))
 
 # Get context from surrounding chunks
 def get_previous_content(chunks, chunk_index):
@@ -39,13 +50,48 @@ def get_after_content(chunks, chunk_index):
     return None if chunk_index == len(chunks) - 1 else chunks[chunk_index + 1].split('\n')[:2] # Get first 2 lines
 
 # 🔍 Translate a single chunk
-def translate_chunk(chunk, chunks, theme_prompt, i):
-    things_to_note_prompt = search_things_to_note_in_prompt(chunk)
+def translate_chunk(chunk, chunks, theme_prompt, i, terminology=None):
+    things_to_note_prompt = search_things_to_note_in_prompt(chunk, terminology)
     previous_content_prompt = get_previous_content(chunks, i)
     after_content_prompt = get_after_content(chunks, i)
     translation, english_result = translate_lines(chunk, previous_content_prompt, after_content_prompt, things_to_note_prompt, theme_prompt, i)
     return i, english_result, translation
 
+# 📦 Pack consecutive chunks into one request up to a token budget
+def pack_chunks(chunks, token_budget):
+    """Group consecutive chunk indices so that each group's source text stays within `token_budget` tokens"""
+    packs, pack, used = [], [], 0
+    for i, chunk in enumerate(chunks):
+        tokens = count_tokens(chunk)
+        if pack and used + tokens > token_budget:
+            packs.append(pack)
+            pack, used = [], 0
+        pack.append(i)
+        used += tokens
+    if pack:
+        packs.append(pack)
+    return packs
+
+def translate_pack(pack, chunks, theme_prompt, terminology=None):
+    """Translate consecutive chunks in one request, then split the lines back per chunk"""
+    if len(pack) == 1:
+        return [translate_chunk(chunks[pack[0]], chunks, theme_prompt, pack[0], terminology)]
+    lines = '\n'.join(chunks[i] for i in pack)
+    things_to_note_prompt = search_things_to_note_in_prompt(lines, terminology)
+    previous_content_prompt = get_previous_content(chunks, pack[0])
+    after_content_prompt = get_after_content(chunks, pack[-1])
+    translation, _ = translate_lines(lines, previous_content_prompt, after_content_prompt, things_to_note_prompt, theme_prompt, pack[0])
+
+    # translate_lines guarantees one translated line per source line; lines are split back by
+    # position, there is no per-chunk source echo to verify so it is left None
+    translated_lines = translation.split('\n')
+    results, start = [], 0
+    for i in pack:
+        end = start + len(chunks[i].split('\n'))
+        results.append((i, None, '\n'.join(translated_lines[start:end])))
+        start = end
+    return results
+
 # Add similarity calculation function
 def similar(a, b):
     return SequenceMatcher(None, a, b).ratio()
@@ -57,42 +103,58 @@ def translate_all():
     chunks = split_chunks_by_chars(chunk_size=600, max_i=10)
     with open(_4_1_TERMINOLOGY, 'r', encoding='utf-8') as file:
         theme_prompt = json.load(file).get('theme')
+    terminology = load_terminology()
+
+    token_budget = load_key("translate_pack_tokens")
+    packs = pack_chunks(chunks, token_budget) if token_budget else [[i] for i in range(len(chunks))]
+    if len(packs) < len(chunks):
+        console.print(f"[cyan]📦 Packed {len(chunks)} chunks into {len(packs)} requests[/cyan]")
 
     # 🔄 Use concurrent execution for translation
     with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
         task = progress.add_task("[cyan]Translating chunks...", total=len(chunks))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=load_key("max_workers")) as executor:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=get_llm_workers()) as executor:
             futures = []
-            for i, chunk in enumerate(chunks):
-                future = executor.submit(translate_chunk, chunk, chunks, theme_prompt, i)
+            for pack in packs:
+                future = executor.submit(translate_pack, pack, chunks, theme_prompt, terminology)
                 futures.append(future)
             results = []
             for future in concurrent.futures.as_completed(futures):
-                results.append(future.result())
-                progress.update(task, advance=1)
+                pack_results = future.result()
+                results.extend(pack_results)
+                progress.update(task, advance=len(pack_results))
 
-    results.sort(key=lambda x: x[0])  # Sort results based on original order
-    
-    # 💾 Save results to lists and Excel file
-    src_text, trans_text = [], []
+    save_translation(chunks, results)
+
+def reassemble_translation(chunks, results, verify=False):
+    """Put translations back in chunk order by index, optionally checking each result against its own chunk (packed results carry no source and are skipped)"""
+    by_index = {i: (english_result, translation) for i, english_result, translation in results}
+    src_text, trans_text, unverified = [], [], 0
     for i, chunk in enumerate(chunks):
         chunk_lines = chunk.split('\n')
         src_text.extend(chunk_lines)
-        
-        # Calculate similarity between current chunk and translation results
-        chunk_text = ''.join(chunk_lines).lower()
-        matching_results = [(r, similar(''.join(r[1].split('\n')).lower(), chunk_text)) 
-                          for r in results]
-        best_match = max(matching_results, key=lambda x: x[1])
-        
-        # Check similarity and handle exceptions
-        if best_match[1] < 0.9:
-            console.print(f"[yellow]Warning: No matching translation found for chunk {i}[/yellow]")
+        if i not in by_index:
             raise ValueError(f"Translation matching failed (chunk {i})")
-        elif best_match[1] < 1.0:
-            console.print(f"[yellow]Warning: Similar match found (chunk {i}, similarity: {best_match[1]:.3f})[/yellow]")
-            
-        trans_text.extend(best_match[0][2].split('\n'))
+        english_result, translation = by_index[i]
+
+        if verify and english_result is None:
+            unverified += 1
+        elif verify:
+            similarity = similar(''.join(english_result.split('\n')).lower(), ''.join(chunk_lines).lower())
+            if similarity < 0.9:
+                console.print(f"[yellow]Warning: No matching translation found for chunk {i}[/yellow]")
+                raise ValueError(f"Translation matching failed (chunk {i})")
+            elif similarity < 1.0:
+                console.print(f"[yellow]Warning: Similar match found (chunk {i}, similarity: {similarity:.3f})[/yellow]")
+
+        trans_text.extend(translation.split('\n'))
+    if unverified:
+        console.print(f"[yellow]Skipped match verification for {unverified} packed chunks, their lines were split back by position[/yellow]")
+    return src_text, trans_text
+
+def save_translation(chunks, results):
+    # 💾 Save results to lists and Excel file
+    src_text, trans_text = reassemble_translation(chunks, results, verify=load_key("verify_translation_match"))
     
     # Trim long translation text
     df_text = pd.read_csv(_2_CLEANED_CHUNKS)
@@ -108,5 +170,91 @@ def translate_all():
     df_time.to_csv(_4_2_TRANSLATION, index=False, encoding='utf-8-sig')
     console.print("[bold green]✅ Translation completed and results saved.[/bold green]")
 
+# 🌊 Streaming variant: translation starts while sentences are still being split by meaning
+@check_file_exists(_4_2_TRANSLATION)
+def translate_all_streaming():
+    console.print("[bold green]Start Splitting and Translating in Stream...[/bold green]")
+    with open(_4_1_TERMINOLOGY, 'r', encoding='utf-8') as file:
+        theme_prompt = json.load(file).get('theme')
+    terminology = load_terminology()
+    if load_key("translate_pack_tokens"):
+        console.print("[yellow]⚠️ translate_pack_tokens is ignored in stream mode, each chunk is sent as soon as it is split[/yellow]")
+    workers = get_llm_workers()
+
+    # both bounded: the consumer blocks once `in_flight` chunks are translating, the queue then fills and the splitter waits
+    chunk_queue = queue.Queue(maxsize=workers)
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    errors = []
+    def produce_chunks():
+        try:
+            if os.path.exists(_3_2_SPLIT_BY_MEANING):  # resumed run, the split is already final
+                with open(_3_2_SPLIT_BY_MEANING, "r", encoding="utf-8") as file:
+                    sentences = file.read().strip().split('\n')
+                for chunk in iter_chunks(sentences, 600, 10):
+                    chunk_queue.put(chunk)
+            else:
+                with open(_3_1_SPLIT_BY_NLP, 'r', encoding='utf-8') as file:
+                    nlp_sentences = [line.strip() for line in file.readlines()]
+                sentences = []
+                def collect(split_sentences):
+                    for sentence in split_sentences:
+                        sentences.append(sentence)
+                        yield sentence
+                for chunk in iter_chunks(collect(iter_split_sentences_by_meaning(nlp_sentences, init_nlp())), 600, 10):
+                    chunk_queue.put(chunk)
+                save_split_sentences(sentences)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            chunk_queue.put(None)
+
+    producer = threading.Thread(target=produce_chunks, daemon=True)
+    producer.start()
+    chunks, futures = [], []
+    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
+        task = progress.add_task("[cyan]Splitting and translating chunks...", total=None)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            def submit(i):
+                in_flight.acquire()
+                future = executor.submit(translate_chunk, chunks[i], chunks, theme_prompt, i, terminology)
+                future.add_done_callback(lambda _: (in_flight.release(), progress.update(task, advance=1)))
+                futures.append(future)
+            while (chunk := chunk_queue.get()) is not None:
+                chunks.append(chunk)
+                # the previous chunk can go now, its after-context (first lines of this one) is known
+                if len(chunks) > 1:
+                    submit(len(chunks) - 2)
+            producer.join()
+            if errors:
+                raise errors[0]
+            if chunks:
+                submit(len(chunks) - 1)
+            results = [future.result() for future in futures]
+
+    save_translation(chunks, results)
+
+def benchmark_reassembly(n_chunks=1000):
+    """Compare index reassembly with the old all-pairs fuzzy matching on synthetic chunks"""
+    chunks = ['\n'.join(f"line {i}-{j} of a synthetic chunk with some words" for j in range(10)) for i in range(n_chunks)]
+    results = [(i, chunk, chunk.upper()) for i, chunk in enumerate(chunks)]
+    random.shuffle(results)
+
+    start = time.time()
+    reassemble_translation(chunks, results, verify=True)
+    console.print(f"index + verify: {time.time() - start:.3f}s")
+
+    start = time.time()
+    reassemble_translation(chunks, results)
+    console.print(f"index: {time.time() - start:.3f}s")
+
+    start = time.time()
+    for chunk in chunks[:max(1, n_chunks // 100)]:  # all-pairs is O(n^2), time 1% of the chunks and extrapolate
+        chunk_text = ''.join(chunk.split('\n')).lower()
+        max(results, key=lambda r: similar(''.join(r[1].split('\n')).lower(), chunk_text))
+    console.print(f"all-pairs (estimated): {(time.time() - start) * n_chunks / max(1, n_chunks // 100):.3f}s")
+
 if __name__ == '__main__':
-    translate_all()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        benchmark_reassembly()
+    else:
+        translate_all()
\ No newline at end of file
@@ -9,6 +9,7 @@ from rich.console import Console
 from rich.table import Table
 from core.utils import *
 from core.utils.models import *
+from core.utils.rate_limiter import get_llm_workers
 console = Console()
 
 # ! You can modify your own weights here
@@ -83,7 +84,7 @@ def split_align_subs(src_lines: List[str], tr_lines: List[str]):
         tr_lines[i] = tr_parts
         remerged_tr_lines[i] = tr_remerged
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=load_key("max_workers")) as executor:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=get_llm_workers()) as executor:
         executor.map(process, to_split)
     
     # Flatten `src_lines` and `tr_lines`
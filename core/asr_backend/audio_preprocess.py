@@ -1,12 +1,11 @@
 import os, subprocess
+import numpy as np
 import pandas as pd
+import soundfile as sf
 from typing import Dict, List, Tuple
 from pydub import AudioSegment
 from core.utils import *
 from core.utils.models import *
-from pydub import AudioSegment
-from pydub.silence import detect_silence
-from pydub.utils import mediainfo
 from rich import print as rprint
 
 def normalize_audio_volume(audio_path, output_path, target_db = -20.0, format = "wav"):
@@ -30,6 +29,44 @@ def convert_video_to_audio(video_file: str):
         ], check=True, stderr=subprocess.PIPE)
         rprint(f"[green]🎬➡️🎵 Converted <{video_file}> to <{_RAW_AUDIO_FILE}> with FFmpeg\n[/green]")
 
+def _pcm16_wav_layout(audio_file: str):
+    """Return (data_offset, n_frames, sample_rate, channels) of a plain 16-bit PCM WAV, or None"""
+    with open(audio_file, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = chunk[:4], int.from_bytes(chunk[4:], 'little')
+            if chunk_id == b'fmt ':
+                data = f.read(size)
+                audio_format, channels = int.from_bytes(data[0:2], 'little'), int.from_bytes(data[2:4], 'little')
+                sample_rate, bits = int.from_bytes(data[4:8], 'little'), int.from_bytes(data[14:16], 'little')
+                fmt = (audio_format, channels, sample_rate, bits)
+                f.seek(size % 2, os.SEEK_CUR)  # chunks are word aligned
+            elif chunk_id == b'data':
+                if fmt is None or fmt[0] != 1 or fmt[3] != 16:
+                    return None
+                offset = f.tell()
+                size = min(size, os.path.getsize(audio_file) - offset)  # header size may be a placeholder
+                return offset, size // (2 * fmt[1]), fmt[2], fmt[1]
+            else:
+                f.seek(size + size % 2, os.SEEK_CUR)
+
+def load_audio_segment(audio_file: str, start: float, end: float, sr: int = 16000) -> np.ndarray:
+    """Load [start, end) seconds as mono float32, memory-mapping 16 kHz mono PCM WAVs instead of decoding and resampling"""
+    layout = _pcm16_wav_layout(audio_file)
+    if layout and layout[2] == sr and layout[3] == 1:
+        offset, n_frames, _, _ = layout
+        pcm = np.memmap(audio_file, dtype='<i2', mode='r', offset=offset, shape=(n_frames,))
+        return pcm[int(start * sr):int(end * sr)].astype(np.float32) / 32768.0
+    import librosa
+    audio, _ = librosa.load(audio_file, sr=sr, offset=start, duration=end - start, mono=True)
+    return audio
+
 def get_audio_duration(audio_file: str) -> float:
     """Get the duration of an audio file using ffmpeg."""
     cmd = ['ffmpeg', '-i', audio_file]
@@ -46,40 +83,90 @@ def get_audio_duration(audio_file: str) -> float:
         duration = 0
     return duration
 
+def detect_silence(samples: np.ndarray, sample_rate: int, min_silence_len: int = 1000, silence_thresh: float = -16, seek_step: int = 1) -> List[List[int]]:
+    """
+    Vectorized drop-in for `pydub.silence.detect_silence` on a float sample array.
+
+    Args:
+        samples: float samples in [-1, 1], shape (n,) or (n, channels)
+        sample_rate: samples per second
+        min_silence_len: minimum silence length in ms
+        silence_thresh: RMS threshold in dBFS, windows at or below it are silent
+        seek_step: step in ms between tested windows
+
+    Returns:
+        List[List[int]]: [start_ms, end_ms] silent ranges, same semantics as pydub
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    seg_len = round(1000 * len(samples) / sample_rate)  # pydub's len() in ms
+    if seg_len < min_silence_len:
+        return []
+
+    # millisecond k starts at frame int(k * sample_rate / 1000) as in pydub, exact for 44.1 kHz too
+    edges = np.arange(seg_len + 1, dtype=np.int64) * sample_rate // 1000
+    power = np.square(samples, dtype=np.float64).sum(axis=1)
+    if edges[-1] > len(power):  # pydub pads the last partial ms with silence
+        power = np.concatenate((power, np.zeros(edges[-1] - len(power))))
+    energy = np.concatenate(([0.0], np.cumsum(power)))
+
+    # RMS of every [i, i + min_silence_len) window, tested at seek_step like pydub
+    last_start = seg_len - min_silence_len
+    starts = np.arange(0, last_start + 1, seek_step)
+    if last_start % seek_step:
+        starts = np.append(starts, last_start)
+    lo, hi = edges[starts], edges[starts + min_silence_len]
+    window_power = (energy[hi] - energy[lo]) / ((hi - lo) * samples.shape[1])
+    thresh_power = (10 ** (silence_thresh / 20)) ** 2
+    silence_starts = starts[window_power <= thresh_power]
+    if len(silence_starts) == 0:
+        return []
+
+    # merge overlapping windows into ranges, a new range begins after a gap longer than min_silence_len
+    breaks = np.flatnonzero(np.diff(silence_starts) > min_silence_len)
+    range_starts = np.concatenate(([silence_starts[0]], silence_starts[breaks + 1]))
+    range_ends = np.concatenate((silence_starts[breaks], [silence_starts[-1]])) + min_silence_len
+    return [[int(s), int(e)] for s, e in zip(range_starts, range_ends)]
+
 def split_audio(audio_file: str, target_len: float = 30*60, win: float = 60) -> List[Tuple[float, float]]:
-    ## Detect silence in [target_len-win, target_len+win] range using pydub, split audio
+    ## Detect silence in [target_len-win, target_len+win] range, split audio
+    ## Only the search windows are read from disk, so memory stays flat for long inputs
     rprint(f"[blue]🎙️ Starting audio segmentation {audio_file} {target_len} {win}[/blue]")
-    audio = AudioSegment.from_file(audio_file)
-    duration = float(mediainfo(audio_file)["duration"])
-    if duration <= target_len + win:
-        return [(0, duration)]
-    segments, pos = [], 0.0
-
-    while pos < duration:
-        if duration - pos <= target_len:
-            segments.append((pos, duration)); break
-
-        threshold = pos + target_len
-        ws, we = int((threshold - win) * 1000), int((threshold + win) * 1000)
-
-        # Get complete silence regions
-        silence_regions = detect_silence(audio[ws:we], min_silence_len=500, silence_thresh=-40)
-        silence_regions = [(s/1000 + (threshold - win), e/1000 + (threshold - win)) for s, e in silence_regions]
-        # Filter silence regions with sufficient length (at least 0.5s) and suitable position
-        valid_regions = [
-            (start, end) for start, end in silence_regions
-            if (end - start) >= 0.5 and threshold - win <= (start + end) / 2 <= threshold + win
-        ]
-
-        if valid_regions:
-            # Select silence segment closest to threshold
-            start, end = min(valid_regions, key=lambda r: abs((r[0] + r[1]) / 2 - threshold))
-            split_at = (start + end) / 2  # Split in the middle of silence
-        else:
-            rprint(f"[yellow]⚠️ No valid silence regions found for {audio_file} at {threshold}s, using threshold[/yellow]")
-            split_at = threshold
-            
-        segments.append((pos, split_at)); pos = split_at
+    with sf.SoundFile(audio_file) as f:
+        sr = f.samplerate
+        duration = f.frames / sr
+        if duration <= target_len + win:
+            return [(0, duration)]
+        segments, pos = [], 0.0
+
+        while pos < duration:
+            if duration - pos <= target_len:
+                segments.append((pos, duration)); break
+
+            threshold = pos + target_len
+            ws, we = int((threshold - win) * sr), min(int((threshold + win) * sr), f.frames)
+
+            # Get complete silence regions
+            f.seek(ws)
+            window = f.read(we - ws, dtype='float32', always_2d=True)
+            silence_regions = detect_silence(window, sr, min_silence_len=500, silence_thresh=-40)
+            silence_regions = [(s/1000 + (threshold - win), e/1000 + (threshold - win)) for s, e in silence_regions]
+            # Filter silence regions with sufficient length (at least 0.5s) and suitable position
+            valid_regions = [
+                (start, end) for start, end in silence_regions
+                if (end - start) >= 0.5 and threshold - win <= (start + end) / 2 <= threshold + win
+            ]
+
+            if valid_regions:
+                # Select silence segment closest to threshold
+                start, end = min(valid_regions, key=lambda r: abs((r[0] + r[1]) / 2 - threshold))
+                split_at = (start + end) / 2  # Split in the middle of silence
+            else:
+                rprint(f"[yellow]⚠️ No valid silence regions found for {audio_file} at {threshold}s, using threshold[/yellow]")
+                split_at = threshold
+                
+            segments.append((pos, split_at)); pos = split_at
 
     rprint(f"[green]🎙️ Audio split completed {len(segments)} segments[/green]")
     return segments
@@ -153,4 +240,28 @@ def save_results(df: pd.DataFrame):
     
     df['text'] = df['text'].apply(lambda x: f'"{x}"')
     df.to_csv(_2_CLEANED_CHUNKS, index=False, encoding='utf-8-sig')
-    rprint(f"[green]📊 CSV file saved to {_2_CLEANED_CHUNKS}[/green]")
\ No newline at end of file
+    rprint(f"[green]📊 CSV file saved to {_2_CLEANED_CHUNKS}[/green]")
+
+def benchmark_detect_silence(minutes: int = 60, sample_rate: int = 16000, seek_step: int = 10):
+    """Compare `detect_silence` against pydub on a synthetic signal with periodic pauses"""
+    import time
+    from pydub.silence import detect_silence as pydub_detect_silence
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(minutes * 60 * sample_rate) * 0.1).astype(np.float32)
+    for t in range(7, minutes * 60, 13):  # ~0.8s pause every 13s
+        samples[t * sample_rate:int((t + 0.8) * sample_rate)] *= 0.001
+    pcm = (samples * 32767).astype(np.int16)
+    audio = AudioSegment(pcm.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
+
+    start = time.time()
+    ours = detect_silence(pcm / 32768.0, sample_rate, min_silence_len=500, silence_thresh=-40, seek_step=seek_step)
+    numpy_time = time.time() - start
+    start = time.time()
+    theirs = pydub_detect_silence(audio, min_silence_len=500, silence_thresh=-40, seek_step=seek_step)
+    pydub_time = time.time() - start
+
+    max_diff = max((abs(a - b) for r1, r2 in zip(ours, theirs) for a, b in zip(r1, r2)), default=0)
+    rprint(f"[cyan]numpy: {numpy_time:.2f}s, pydub: {pydub_time:.2f}s, regions: {len(ours)} vs {len(theirs)}, max boundary diff: {max_diff}ms[/cyan]")
+
+if __name__ == "__main__":
+    benchmark_detect_silence()
@@ -1,15 +1,19 @@
 import os
+import gc
+import json
 import warnings
 import time
 import subprocess
 import torch
 import whisperx
-import librosa
 from rich import print as rprint
 from core.utils import *
+from core.asr_backend.audio_preprocess import load_audio_segment
 
 warnings.filterwarnings("ignore")
 MODEL_DIR = load_key("model_dir")
+HF_MIRROR_CACHE = os.path.join(MODEL_DIR, "hf_mirror.json")
+HF_MIRROR_TTL = 24 * 3600  # seconds
 
 @except_handler("failed to check hf mirror", default_return=None)
 def check_hf_mirror():
@@ -35,13 +39,27 @@ def check_hf_mirror():
     rprint(f"[cyan]🚀 Selected mirror:[/cyan] {fastest_url} ({best_time:.2f}s)")
     return fastest_url
 
-@except_handler("WhisperX processing error:")
-def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
-    os.environ['HF_ENDPOINT'] = check_hf_mirror()
-    WHISPER_LANGUAGE = load_key("whisper.language")
+def get_hf_endpoint():
+    """Return the HF endpoint, from the environment or a cached mirror check younger than HF_MIRROR_TTL"""
+    if os.environ.get('HF_ENDPOINT'):
+        return os.environ['HF_ENDPOINT']
+    try:
+        with open(HF_MIRROR_CACHE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if time.time() - cached['checked_at'] < HF_MIRROR_TTL:
+            rprint(f"[cyan]🚀 Using cached mirror:[/cyan] {cached['url']}")
+            return cached['url']
+    except (OSError, ValueError, KeyError):
+        pass
+    url = check_hf_mirror()
+    if url:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        with open(HF_MIRROR_CACHE, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'checked_at': time.time()}, f)
+    return url
+
+def get_device_settings():
     device = "cuda" if torch.cuda.is_available() else "cpu"
-    rprint(f"🚀 Starting WhisperX using device: {device} ...")
-    
     if device == "cuda":
         gpu_mem = torch.cuda.get_device_properties(0).total_memory / (1024**3)
         batch_size = 16 if gpu_mem > 8 else 2
@@ -54,6 +72,85 @@ def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
         batch_size = 1
         compute_type = "int8"
         rprint(f"[cyan]📦 Batch size:[/cyan] {batch_size}, [cyan]⚙️ Compute type:[/cyan] {compute_type}")
+    return device, batch_size, compute_type
+
+# ------------
+# model session
+# ------------
+
+class WhisperXSession:
+    """Keeps the ASR and align models loaded across the segments of a transcription until `release()` is called"""
+
+    def __init__(self):
+        self.mirror_checked = False
+        self.asr_key = None
+        self.asr_model = None
+        self.align_models = {}
+
+    def ensure_hf_endpoint(self):
+        if self.mirror_checked:
+            return
+        endpoint = get_hf_endpoint()
+        if endpoint:
+            os.environ['HF_ENDPOINT'] = endpoint
+        self.mirror_checked = True
+
+    def get_asr_model(self, model_name, device, compute_type, vad_options, asr_options):
+        # language is not part of the key, it is passed per transcribe call so `auto` and
+        # the detected language share one model
+        key = (model_name, device, compute_type, repr(sorted(asr_options.items())))
+        if self.asr_key != key:
+            # only one ASR model is kept resident, swap it out when settings change
+            self.release_asr()
+            if not os.path.exists(model_name):  # local models need no download
+                self.ensure_hf_endpoint()
+            rprint("[bold yellow] You can ignore warning of `Model was trained with torch 1.10.0+cu102, yours is 2.0.0+cu118...`[/bold yellow]")
+            self.asr_model = whisperx.load_model(model_name, device, compute_type=compute_type, vad_options=vad_options, asr_options=asr_options, download_root=MODEL_DIR)
+            self.asr_key = key
+        return self.asr_model
+
+    def get_align_model(self, language_code, device):
+        key = (language_code, device)
+        if key not in self.align_models:
+            self.ensure_hf_endpoint()
+            self.align_models[key] = whisperx.load_align_model(language_code=language_code, device=device)
+        return self.align_models[key]
+
+    def release_asr(self):
+        if self.asr_model is not None:
+            self.asr_model, self.asr_key = None, None
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def release(self):
+        self.release_asr()
+        self.align_models.clear()
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+_SESSION = None
+
+def get_session() -> WhisperXSession:
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = WhisperXSession()
+    return _SESSION
+
+def release_session():
+    """Free the cached WhisperX models right after transcription, the session (and its mirror check) is kept"""
+    if _SESSION is not None and (_SESSION.asr_model is not None or _SESSION.align_models):
+        _SESSION.release()
+        rprint("[green]🧹 Released WhisperX models[/green]")
+
+@except_handler("WhisperX processing error:")
+def transcribe_audio(raw_audio_file, vocal_audio_file, start, end, language=None):
+    """`language` overrides whisper.language, parallel workers get the one detected up front"""
+    session = get_session()
+    WHISPER_LANGUAGE = language or load_key("whisper.language")
+    device, batch_size, compute_type = get_device_settings()
+    rprint(f"🚀 Starting WhisperX using device: {device} ...")
     rprint(f"[green]▶️ Starting WhisperX for segment {start:.2f}s to {end:.2f}s...[/green]")
     
     if WHISPER_LANGUAGE == 'zh':
@@ -80,12 +177,8 @@ def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
         rprint(f"[cyan]🏷️ Hotwords enabled:[/cyan] {hotwords_list}")
 
     whisper_language = None if 'auto' in WHISPER_LANGUAGE else WHISPER_LANGUAGE
-    rprint("[bold yellow] You can ignore warning of `Model was trained with torch 1.10.0+cu102, yours is 2.0.0+cu118...`[/bold yellow]")
-    model = whisperx.load_model(model_name, device, compute_type=compute_type, language=whisper_language, vad_options=vad_options, asr_options=asr_options, download_root=MODEL_DIR)
+    model = session.get_asr_model(model_name, device, compute_type, vad_options, asr_options)
 
-    def load_audio_segment(audio_file, start, end):
-        audio, _ = librosa.load(audio_file, sr=16000, offset=start, duration=end - start, mono=True)
-        return audio
     raw_audio_segment = load_audio_segment(raw_audio_file, start, end)
     vocal_audio_segment = load_audio_segment(vocal_audio_file, start, end)
     
@@ -94,17 +187,13 @@ def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
     # -------------------------
     transcribe_start_time = time.time()
     rprint("[bold green]Note: You will see Progress if working correctly ↓[/bold green]")
-    result = model.transcribe(raw_audio_segment, batch_size=batch_size, print_progress=True)
+    result = model.transcribe(raw_audio_segment, batch_size=batch_size, language=whisper_language, print_progress=True)
     transcribe_time = time.time() - transcribe_start_time
     rprint(f"[cyan]⏱️ time transcribe:[/cyan] {transcribe_time:.2f}s")
 
-    # Free GPU resources
-    del model
-    torch.cuda.empty_cache()
-
-    # Save language
-    update_key("whisper.language", result['language'])
-    if result['language'] == 'zh' and WHISPER_LANGUAGE != 'zh':
+    # Language is saved by the caller, segments may run in parallel worker processes
+    language = result['language']
+    if language == 'zh' and WHISPER_LANGUAGE != 'zh':
         raise ValueError("Please specify the transcription language as zh and try again!")
 
     # -------------------------
@@ -112,15 +201,11 @@ def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
     # -------------------------
     align_start_time = time.time()
     # Align timestamps using vocal audio
-    model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
+    model_a, metadata = session.get_align_model(language, device)
     result = whisperx.align(result["segments"], model_a, metadata, vocal_audio_segment, device, return_char_alignments=False)
     align_time = time.time() - align_start_time
     rprint(f"[cyan]⏱️ time align:[/cyan] {align_time:.2f}s")
 
-    # Free GPU resources again
-    torch.cuda.empty_cache()
-    del model_a
-
     # Adjust timestamps
     for segment in result['segments']:
         segment['start'] += start
@@ -130,4 +215,5 @@ def transcribe_audio(raw_audio_file, vocal_audio_file, start, end):
                 word['start'] += start
             if 'end' in word:
                 word['end'] += start
+    result['language'] = language
     return result
\ No newline at end of file
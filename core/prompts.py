@@ -125,21 +125,24 @@ Note: Start you answer with ```json and end with ```, do not add any other text.
 
 ## ================================================================
 # @ step5_translate.py & translate_lines.py
+# Translation prompts keep everything that is the same for a whole video (role, task,
+# principles, content summary) in front, so provider-side prompt caching can reuse that
+# prefix; the per-chunk parts (terms, context, lines, json template) come after it.
 def generate_shared_prompt(previous_content_prompt, after_content_prompt, summary_prompt, things_to_note_prompt):
-    return f'''### Context Information
+    return f'''### Content Summary
+{summary_prompt}
+
+### Points to Note
+{things_to_note_prompt}
+
+### Context Information
 <previous_content>
 {previous_content_prompt}
 </previous_content>
 
 <subsequent_content>
 {after_content_prompt}
-</subsequent_content>
-
-### Content Summary
-{summary_prompt}
-
-### Points to Note
-{things_to_note_prompt}'''
+</subsequent_content>'''
 
 def get_prompt_faithfulness(lines, shared_prompt):
     TARGET_LANGUAGE = load_key("target_language")
@@ -164,14 +167,14 @@ We have a segment of original {src_language} subtitles that need to be directly
 2. Ensure the translation is faithful to the original, accurately conveying the original meaning
 3. Consider the context and professional terminology
 
-{shared_prompt}
-
 <translation_principles>
 1. Faithful to the original: Accurately convey the content and meaning of the original text, without arbitrarily changing, adding, or omitting content.
 2. Accurate terminology: Use professional terms correctly and maintain consistency in terminology.
 3. Understand the context: Fully comprehend and reflect the background and contextual relationships of the text.
 </translation_principles>
 
+{shared_prompt}
+
 ## INPUT
 <subtitles>
 {lines}
@@ -216,8 +219,6 @@ Your task is to reflect on and improve these direct translations to create more
 4. Do not add comments or explanations in the translation, as the subtitles are for the audience to read
 5. Do not leave empty lines in the free translation, as the subtitles are for the audience to read
 
-{shared_prompt}
-
 <Translation Analysis Steps>
 Please use a two-step thinking process to handle the text line by line:
 
@@ -231,6 +232,8 @@ Please use a two-step thinking process to handle the text line by line:
    - Ensure it's easy for {TARGET_LANGUAGE} audience to understand and accept
    - Adapt the language style to match the theme (e.g., use casual language for tutorials, professional terminology for technical content, formal language for documentaries)
 </Translation Analysis Steps>
+
+{shared_prompt}
    
 ## INPUT
 <subtitles>
@@ -247,6 +250,68 @@ Note: Start you answer with ```json and end with ```, do not add any other text.
     return prompt_expressiveness.strip()
 
 
+def get_prompt_faithful_expressive(lines, shared_prompt):
+    TARGET_LANGUAGE = load_key("target_language")
+    json_dict = {}
+    for i, line in enumerate(lines.split('\n'), 1):
+        json_dict[f"{i}"] = {
+            "origin": line,
+            "direct": f"direct {TARGET_LANGUAGE} translation {i}.",
+            "reflect": "your reflection on direct translation",
+            "free": "your free translation"
+        }
+    json_format = json.dumps(json_dict, indent=2, ensure_ascii=False)
+
+    src_language = load_key("whisper.language")
+    prompt_faithful_expressive = f'''
+## Role
+You are a professional Netflix subtitle translator and language consultant, fluent in both {src_language} and {TARGET_LANGUAGE}, as well as their respective cultures.
+Your expertise lies in faithfully translating the original {src_language} text and then optimizing the {TARGET_LANGUAGE} translation to suit the target language's expression habits and cultural background.
+
+## Task
+We have a segment of original {src_language} subtitles that need to be translated into {TARGET_LANGUAGE}. These subtitles come from a specific context and may contain specific themes and terminology.
+
+1. Translate the original {src_language} subtitles into {TARGET_LANGUAGE} line by line, faithfully and with accurate terminology
+2. Reflect on each direct translation, pointing out existing issues
+3. Perform free translation based on your reflection
+4. Do not add comments or explanations in the translation, as the subtitles are for the audience to read
+5. Do not leave empty lines in the free translation, as the subtitles are for the audience to read
+
+<Translation Analysis Steps>
+Please use a three-step thinking process to handle the text line by line:
+
+1. {TARGET_LANGUAGE} Direct Translation:
+   - Accurately convey the content and meaning of the original text, without arbitrarily changing, adding, or omitting content
+   - Use professional terms correctly and keep terminology consistent
+
+2. Direct Translation Reflection:
+   - Evaluate language fluency
+   - Check if the language style is consistent with the original text
+   - Check the conciseness of the subtitles, point out where the translation is too wordy
+
+3. {TARGET_LANGUAGE} Free Translation:
+   - Aim for contextual smoothness and naturalness, conforming to {TARGET_LANGUAGE} expression habits
+   - Ensure it's easy for {TARGET_LANGUAGE} audience to understand and accept
+   - Adapt the language style to match the theme (e.g., use casual language for tutorials, professional terminology for technical content, formal language for documentaries)
+</Translation Analysis Steps>
+
+{shared_prompt}
+
+## INPUT
+<subtitles>
+{lines}
+</subtitles>
+
+## Output in only JSON format and no other text
+```json
+{json_format}
+```
+
+Note: Start you answer with ```json and end with ```, do not add any other text.
+'''
+    return prompt_faithful_expressive.strip()
+
+
 ## ================================================================
 # @ step6_splitforsub.py
 def get_align_prompt(src_sub, tr_sub, src_part):
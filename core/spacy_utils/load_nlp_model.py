@@ -1,3 +1,4 @@
+import threading
 import spacy
 from spacy.cli import download
 from core.utils import rprint, load_key, except_handler
@@ -10,24 +11,53 @@ def get_spacy_model(language: str):
         rprint(f"[yellow]Spacy model does not support '{language}', using en_core_web_md model as fallback...[/yellow]")
     return model
 
-@except_handler("Failed to load NLP Spacy model")
-def init_nlp():
-    language = load_key("whisper.language")
-    model = get_spacy_model(language)
+# --------------------
+# model registry
+# --------------------
+# One model per language for the whole process, shared by split_by_spacy and
+# split_sentences_by_meaning and reused across batch videos.
+# Components no stage reads are excluded at load time to save RAM and startup.
+UNUSED_COMPONENTS = ["ner", "lemmatizer"]
+_NLP_MODELS = {}
+_LOCK = threading.Lock()
+
+def _load_model(model):
     rprint(f"[blue]⏳ Loading NLP Spacy model: <{model}> ...[/blue]")
     try:
-        nlp = spacy.load(model)
-    except:
+        nlp = spacy.load(model, exclude=UNUSED_COMPONENTS)
+    except OSError:
         rprint(f"[yellow]Downloading {model} model...[/yellow]")
         rprint("[yellow]If download failed, please check your network and try again.[/yellow]")
         download(model)
-        nlp = spacy.load(model)
+        nlp = spacy.load(model, exclude=UNUSED_COMPONENTS)
     rprint("[green]✅ NLP Spacy model loaded successfully![/green]")
     return nlp
 
+@except_handler("Failed to load NLP Spacy model")
+def init_nlp(language=None):
+    language = language or load_key("whisper.language")
+    model = get_spacy_model(language)
+    with _LOCK:
+        if model not in _NLP_MODELS:
+            _NLP_MODELS[model] = _load_model(model)
+        return _NLP_MODELS[model]
+
+def preload_nlp(languages):
+    """Warm the registry, e.g. with every source language of a batch before the first video"""
+    for language in dict.fromkeys(languages):
+        try:
+            init_nlp(language)
+        except Exception:
+            pass  # already reported, the video's own split step will retry
+
 # --------------------
-# define the intermediate files
+# batched processing
 # --------------------
-SPLIT_BY_COMMA_FILE = "output/log/split_by_comma.txt"
-SPLIT_BY_CONNECTOR_FILE = "output/log/split_by_connector.txt"
-SPLIT_BY_MARK_FILE = "output/log/split_by_mark.txt"
+# Splitters need every loaded component (UNUSED_COMPONENTS are already excluded at load),
+# token counting needs the tokenizer only
+TOKENIZE_DISABLE = None
+
+def pipe_docs(nlp, texts, disable=()):
+    """Stream texts through `nlp.pipe` with batch_size/n_process from config, skipping `disable` (None = all components)"""
+    disable = nlp.pipe_names if disable is None else [name for name in disable if name in nlp.pipe_names]
+    return nlp.pipe(texts, batch_size=load_key("spacy_pipe.batch_size"), n_process=load_key("spacy_pipe.n_process"), disable=disable)
@@ -1,12 +1,15 @@
-import os
 import pandas as pd
 import warnings
-from core.spacy_utils.load_nlp_model import init_nlp, SPLIT_BY_MARK_FILE
+from spacy.tokens import Doc
+from core.spacy_utils.load_nlp_model import init_nlp, pipe_docs
 from core.utils.config_utils import load_key, get_joiner
 from rich import print as rprint
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+PIECE_WORDS = 1000  # minimum words per piece handed to nlp.pipe
+SENTENCE_ENDS = ('.', '?', '!', '。', '？', '！')
+
 def split_by_mark(nlp):
     language = load_key("whisper.language")
     joiner = get_joiner(language)
@@ -14,49 +17,39 @@ def split_by_mark(nlp):
     chunks = pd.read_csv("output/log/cleaned_chunks.csv")
     chunks.text = chunks.text.apply(lambda x: x.strip('"').strip(""))
     
-    # join with joiner
-    input_text = joiner.join(chunks.text.to_list())
+    # cut the transcript into pieces at sentence ends, parse them in batches and stitch back into one doc
+    pieces, piece = [], []
+    for word in chunks.text.to_list():
+        piece.append(word)
+        if len(piece) >= PIECE_WORDS and word.endswith(SENTENCE_ENDS) and not word.endswith('...'):
+            pieces.append(joiner.join(piece)); piece = []
+    if piece:
+        pieces.append(joiner.join(piece))
 
-    doc = nlp(input_text)
+    doc = Doc.from_docs(list(pipe_docs(nlp, pieces)), ensure_whitespace=joiner == " ")
     assert doc.has_annotation("SENT_START")
 
-    # skip - and ...
-    sentences_by_mark = []
-    current_sentence = []
-    
-    # iterate all sentences
+    # skip - and ..., merge such sentences into one span of the doc
+    spans = []
     for sent in doc.sents:
         text = sent.text.strip()
-        
-        # check if the current sentence ends with - or ...
-        if current_sentence and (
+        if spans and (
             text.startswith('-') or 
             text.startswith('...') or
-            current_sentence[-1].endswith('-') or
-            current_sentence[-1].endswith('...')
+            spans[-1].text.strip().endswith('-') or
+            spans[-1].text.strip().endswith('...')
         ):
-            current_sentence.append(text)
+            spans[-1] = doc[spans[-1].start:sent.end]
+        elif spans and text in [',', '.', '，', '。', '？', '！']:
+            # ! If the current sentence contains only punctuation, merge it with the previous one, this happens in Chinese, Japanese, etc.
+            spans[-1] = doc[spans[-1].start:sent.end]
         else:
-            if current_sentence:
-                sentences_by_mark.append(' '.join(current_sentence))
-                current_sentence = []
-            current_sentence.append(text)
-    
-    # add the last sentence
-    if current_sentence:
-        sentences_by_mark.append(' '.join(current_sentence))
+            spans.append(sent)
 
-    with open(SPLIT_BY_MARK_FILE, "w", encoding="utf-8") as output_file:
-        for i, sentence in enumerate(sentences_by_mark):
-            if i > 0 and sentence.strip() in [',', '.', '，', '。', '？', '！']:
-                # ! If the current line contains only punctuation, merge it with the previous line, this happens in Chinese, Japanese, etc.
-                output_file.seek(output_file.tell() - 1, os.SEEK_SET)  # Move to the end of the previous line
-                output_file.write(sentence)  # Add the punctuation
-            else:
-                output_file.write(sentence + "\n")
-    
-    rprint(f"[green]💾 Sentences split by punctuation marks saved to →  `{SPLIT_BY_MARK_FILE}`[/green]")
+    rprint(f"[green]✂️  Split by punctuation marks into {len(spans)} sentences[/green]")
+    return spans
 
 if __name__ == "__main__":
     nlp = init_nlp()
-    split_by_mark(nlp)
+    for span in split_by_mark(nlp):
+        print(span.text)
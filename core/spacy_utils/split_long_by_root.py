@@ -1,15 +1,13 @@
-import os
 import string
 import warnings
-from core.spacy_utils.load_nlp_model import init_nlp, SPLIT_BY_CONNECTOR_FILE
+from core.spacy_utils.load_nlp_model import init_nlp
 from core.utils import *
 from core.utils.models import _3_1_SPLIT_BY_NLP
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
-def split_long_sentence(doc):
-    tokens = [token.text for token in doc]
-    n = len(tokens)
+def split_long_sentence(span):
+    n = len(span)
     
     # dynamic programming array, dp[i] represents the optimal split scheme from the start to the ith token
     dp = [float('inf')] * (n + 1)
@@ -21,7 +19,7 @@ def split_long_sentence(doc):
     for i in range(1, n + 1):
         for j in range(max(0, i - 100), i):  # limit search range to avoid overly long sentences
             if i - j >= 30:  # ensure sentence length is at least 30
-                token = doc[i-1]
+                token = span[i-1]
                 if j == 0 or (token.is_sent_end or token.pos_ in ['VERB', 'AUX'] or token.dep_ == 'ROOT'):
                     if dp[j] + 1 < dp[i]:
                         dp[i] = dp[j] + 1
@@ -30,50 +28,40 @@ def split_long_sentence(doc):
     # rebuild sentences based on optimal split points
     sentences = []
     i = n
-    language = load_key("whisper.language")
-    joiner = get_joiner(language)
     while i > 0:
         j = prev[i]
-        sentences.append(joiner.join(tokens[j:i]).strip())
+        sentences.append(span[j:i])
         i = j
     
     return sentences[::-1]  # reverse list to keep original order
 
-def split_extremely_long_sentence(doc):
-    tokens = [token.text for token in doc]
-    n = len(tokens)
+def split_extremely_long_sentence(span):
+    n = len(span)
     
     num_parts = (n + 59) // 60  # round up
     
     part_length = n // num_parts
 
     sentences = []
-    language = load_key("whisper.language")
-    joiner = get_joiner(language)
     for i in range(num_parts):
         start = i * part_length
         end = start + part_length if i < num_parts - 1 else n
-        sentence = joiner.join(tokens[start:end])
-        sentences.append(sentence)
+        sentences.append(span[start:end])
     
     return sentences
 
 
-def split_long_by_root_main(nlp):
-    with open(SPLIT_BY_CONNECTOR_FILE, "r", encoding="utf-8") as input_file:
-        sentences = input_file.readlines()
-
+def split_long_by_root_main(spans):
     all_split_sentences = []
-    for sentence in sentences:
-        doc = nlp(sentence.strip())
-        if len(doc) > 60:
-            split_sentences = split_long_sentence(doc)
-            if any(len(nlp(sent)) > 60 for sent in split_sentences):
-                split_sentences = [subsent for sent in split_sentences for subsent in split_extremely_long_sentence(nlp(sent))]
-            all_split_sentences.extend(split_sentences)
-            rprint(f"[yellow]✂️  Splitting long sentences by root: {sentence[:30]}...[/yellow]")
+    for span in spans:
+        if len(span) > 60:
+            split_sentences = split_long_sentence(span)
+            if any(len(sent) > 60 for sent in split_sentences):
+                split_sentences = [subsent for sent in split_sentences for subsent in split_extremely_long_sentence(sent)]
+            all_split_sentences.extend(sent.text.strip() for sent in split_sentences)
+            rprint(f"[yellow]✂️  Splitting long sentences by root: {span.text[:30]}...[/yellow]")
         else:
-            all_split_sentences.append(sentence.strip())
+            all_split_sentences.append(span.text.strip())
 
     punctuation = string.punctuation + "'" + '"'  # include all punctuation and apostrophe ' and "
 
@@ -87,15 +75,9 @@ def split_long_by_root_main(nlp):
                 continue
             output_file.write(sentence + "\n")
 
-    # delete the original file
-    os.remove(SPLIT_BY_CONNECTOR_FILE)   
-
     rprint(f"[green]💾 Long sentences split by root saved to →  {_3_1_SPLIT_BY_NLP}[/green]")
 
 if __name__ == "__main__":
     nlp = init_nlp()
-    split_long_by_root_main(nlp)
-    # nlp = init_nlp()
-    # doc = nlp(raw.strip())
-    # for sent in split_still_long_sentence(doc):
-    #     print(sent, '\n==========')
+    for sent in split_long_sentence(nlp("This is a test sentence. " * 20)[:]):
+        print(sent.text, '\n==========')
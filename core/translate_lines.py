@@ -1,4 +1,11 @@
-from core.prompts import generate_shared_prompt, get_prompt_faithfulness, get_prompt_expressiveness
+import re
+import sys
+import json
+import time
+import json_repair
+from unittest import mock
+from core.prompts import generate_shared_prompt, get_prompt_faithfulness, get_prompt_expressiveness, get_prompt_faithful_expressive
+from core.utils.token_counter import count_tokens
 from rich.panel import Panel
 from rich.console import Console
 from rich.table import Table
@@ -18,35 +25,46 @@ def valid_translate_result(result: dict, required_keys: list, required_sub_keys:
 
     return {"status": "success", "message": "Translation completed"}
 
-def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_to_note_prompt, summary_prompt, index = 0):
+def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_to_note_prompt, summary_prompt, index = 0, single_pass = None):
     shared_prompt = generate_shared_prompt(previous_content_prompt, after_cotent_prompt, summary_prompt, things_to_note_prompt)
 
     # Retry translation if the length of the original text and the translated text are not the same, or if the specified key is missing
     def retry_translation(prompt, length, step_name):
-        def valid_faith(response_data):
-            return valid_translate_result(response_data, [str(i) for i in range(1, length+1)], ['direct'])
-        def valid_express(response_data):
-            return valid_translate_result(response_data, [str(i) for i in range(1, length+1)], ['free'])
+        required_sub_keys = {'faithfulness': ['direct'], 'expressiveness': ['free'], 'faithful_expressive': ['direct', 'free']}[step_name]
+        def valid_step(response_data):
+            return valid_translate_result(response_data, [str(i) for i in range(1, length+1)], required_sub_keys)
+        def stream_check(partial):
+            # with api.stream_json: stop as soon as a finished line key is not one of 1..length
+            if not isinstance(partial, dict):
+                return None
+            unexpected = [key for key in list(partial)[:-1] if key not in {str(i) for i in range(1, length+1)}]  # the last key may still be streaming
+            return f"Unexpected key(s): {', '.join(unexpected)}" if unexpected else None
         for retry in range(3):
-            if step_name == 'faithfulness':
-                result = ask_gpt(prompt+retry* " ", resp_type='json', valid_def=valid_faith, log_title=f'translate_{step_name}')
-            elif step_name == 'expressiveness':
-                result = ask_gpt(prompt+retry* " ", resp_type='json', valid_def=valid_express, log_title=f'translate_{step_name}')
+            result = ask_gpt(prompt+retry* " ", resp_type='json', valid_def=valid_step, log_title=f'translate_{step_name}', stream_check=stream_check)
             if len(lines.split('\n')) == len(result):
                 return result
             if retry != 2:
                 console.print(f'[yellow]⚠️ {step_name.capitalize()} translation of block {index} failed, Retry...[/yellow]')
-        raise ValueError(f'[red]❌ {step_name.capitalize()} translation of block {index} failed after 3 retries. Please check `output/gpt_log/error.json` for more details.[/red]')
+        raise ValueError(f'[red]❌ {step_name.capitalize()} translation of block {index} failed after 3 retries. Please check `output/gpt_log/error.jsonl` for more details.[/red]')
 
-    ## Step 1: Faithful to the Original Text
-    prompt1 = get_prompt_faithfulness(lines, shared_prompt)
-    faith_result = retry_translation(prompt1, len(lines.split('\n')), 'faithfulness')
+    reflect_translate = load_key('reflect_translate')
+    single_pass = reflect_translate and (load_key('single_pass_translate') if single_pass is None else single_pass)
+    express_step = 'faithful_expressive' if single_pass else 'expressiveness'
+
+    if single_pass:
+        ## Single pass: direct and free translation in one request
+        prompt = get_prompt_faithful_expressive(lines, shared_prompt)
+        express_result = retry_translation(prompt, len(lines.split('\n')), express_step)
+        faith_result = {key: {"origin": origin, "direct": express_result[key]["direct"]} for key, origin in zip(express_result, lines.split('\n'))}
+    else:
+        ## Step 1: Faithful to the Original Text
+        prompt1 = get_prompt_faithfulness(lines, shared_prompt)
+        faith_result = retry_translation(prompt1, len(lines.split('\n')), 'faithfulness')
 
     for i in faith_result:
         faith_result[i]["direct"] = faith_result[i]["direct"].replace('\n', ' ')
 
     # If reflect_translate is False or not set, use faithful translation directly
-    reflect_translate = load_key('reflect_translate')
     if not reflect_translate:
         # If reflect_translate is False or not set, use faithful translation directly
         translate_result = "\n".join([faith_result[i]["direct"].strip() for i in faith_result])
@@ -63,8 +81,9 @@ def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_
         return translate_result, lines
 
     ## Step 2: Express Smoothly  
-    prompt2 = get_prompt_expressiveness(faith_result, lines, shared_prompt)
-    express_result = retry_translation(prompt2, len(lines.split('\n')), 'expressiveness')
+    if not single_pass:
+        prompt2 = get_prompt_expressiveness(faith_result, lines, shared_prompt)
+        express_result = retry_translation(prompt2, len(lines.split('\n')), express_step)
 
     table = Table(title="Translation Results", show_header=False, box=box.ROUNDED)
     table.add_column("Translations", style="bold")
@@ -80,13 +99,53 @@ def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_
     translate_result = "\n".join([express_result[i]["free"].replace('\n', ' ').strip() for i in express_result])
 
     if len(lines.split('\n')) != len(translate_result.split('\n')):
-        console.print(Panel(f'[red]❌ Translation of block {index} failed, Length Mismatch, Please check `output/gpt_log/translate_expressiveness.json`[/red]'))
+        console.print(Panel(f'[red]❌ Translation of block {index} failed, Length Mismatch, Please check `output/gpt_log/translate_{express_step}.jsonl`[/red]'))
         raise ValueError(f'Origin ···{lines}···,\nbut got ···{translate_result}···')
 
     return translate_result, lines
 
 
+
+def benchmark_single_pass(n_chunks=5, first_token_latency=0.3, tokens_per_second=100):
+    """Tokens and wall-clock per chunk, two-call vs single pass, against a local stub LLM that fills the prompt's JSON template"""
+    sample = [
+        "All of you know Andrew Ng as a famous computer science professor at Stanford.",
+        "He was really early on in the development of neural networks with GPUs.",
+        "Of course, a creator of Coursera and popular courses like deeplearning.ai.",
+        "Also the founder and creator and early lead of Google Brain.",
+    ]
+    chunks = ['\n'.join(sample[(c + k) % len(sample)] for k in range(8)) for c in range(n_chunks)]
+    usage = {}
+
+    def stub_llm(prompt, **kwargs):  # any ask_gpt keyword is accepted and ignored
+        template = json_repair.loads(re.findall(r"```json\n(.*?)\n```", prompt, re.S)[-1])
+        resp = {key: {field: text if field == "origin" else f"{field}: {item['origin']}" for field, text in item.items()}
+                for key, item in template.items()}
+        completion = json.dumps(resp, ensure_ascii=False)
+        time.sleep(first_token_latency + count_tokens(completion) / tokens_per_second)
+        usage["prompt"] = usage.get("prompt", 0) + count_tokens(prompt)
+        usage["completion"] = usage.get("completion", 0) + count_tokens(completion)
+        usage["calls"] = usage.get("calls", 0) + 1
+        return resp
+
+    table = Table(title=f"Translation per chunk ({n_chunks} chunks, stub LLM)")
+    for column in ("mode", "calls", "prompt tokens", "completion tokens", "seconds"):
+        table.add_column(column)
+    # patched on this module (also when run as __main__), restored even if a run raises
+    with mock.patch.object(sys.modules[__name__], "ask_gpt", stub_llm):
+        for name, single_pass in (("two calls", False), ("single pass", True)):
+            usage.clear()
+            start = time.time()
+            for i, chunk in enumerate(chunks):
+                translate_lines(chunk, None, None, None, None, i, single_pass=single_pass)
+            elapsed = time.time() - start
+            table.add_row(name, f"{usage['calls'] / n_chunks:.1f}", f"{usage['prompt'] / n_chunks:.0f}", f"{usage['completion'] / n_chunks:.0f}", f"{elapsed / n_chunks:.2f}")
+    console.print(table)
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        benchmark_single_pass()
+        sys.exit()
     # test e.g.
     lines = '''All of you know Andrew Ng as a famous computer science professor at Stanford.
 He was really early on in the development of neural networks with GPUs.
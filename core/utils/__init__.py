@@ -1,6 +1,6 @@
 # use try-except to avoid error when installing
 try:
-    from .ask_gpt import ask_gpt
+    from .ask_gpt import ask_gpt, ask_gpt_async
     from .decorator import except_handler, check_file_exists
     from .config_utils import load_key, update_key, get_joiner
     from .csv_utils import safe_read_csv, safe_write_csv, read_csv_with_columns
@@ -10,6 +10,7 @@ except ImportError:
 
 __all__ = [
     "ask_gpt",
+    "ask_gpt_async",
     "except_handler",
     "check_file_exists",
     "load_key",
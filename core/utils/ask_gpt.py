@@ -1,76 +1,174 @@
 import os
 import json
+import time
+import asyncio
+import weakref
+import hashlib
 from threading import Lock
 import json_repair
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from core.utils.config_utils import load_key
 from rich import print as rprint
 from core.utils.decorator import except_handler
+from core.utils import llm_cache, llm_metrics
+from core.utils.rate_limiter import get_limiter
 
 # ------------
 # cache gpt response
 # ------------
+# Each log_title is an append-only JSONL file, one record per line.
+# An in-memory index maps hash(prompt, resp_type) -> byte offset, so lookups
+# and writes are O(1) instead of re-reading the whole log every call.
 
 LOCK = Lock()
 GPT_LOG_FOLDER = 'output/gpt_log'
+_INDEX = {}  # file path -> {"size": known file size, "offsets": {key: offset}}
+
+def _cache_key(prompt, resp_type):
+    return hashlib.sha256(f"{resp_type}\n{prompt}".encode('utf-8')).hexdigest()
+
+def _log_file(log_title):
+    return os.path.join(GPT_LOG_FOLDER, f"{log_title}.jsonl")
+
+def _get_index(file):
+    """Return the offset index of `file`, rebuilding it if the file changed behind our back (e.g. moved by cleanup)"""
+    size = os.path.getsize(file) if os.path.exists(file) else 0
+    index = _INDEX.get(file)
+    if index is not None and index["size"] == size:
+        return index["offsets"]
+    offsets = {}
+    if size:
+        with open(file, 'rb') as f:
+            offset = f.tell()
+            for line in iter(f.readline, b''):
+                try:
+                    offsets.setdefault(json.loads(line)["key"], offset)
+                except (ValueError, KeyError):
+                    pass  # skip a torn last line
+                offset = f.tell()
+    _INDEX[file] = {"size": size, "offsets": offsets}
+    return offsets
 
 def _save_cache(model, prompt, resp_content, resp_type, resp, message=None, log_title="default"):
     with LOCK:
-        logs = []
-        file = os.path.join(GPT_LOG_FOLDER, f"{log_title}.json")
+        file = _log_file(log_title)
         os.makedirs(os.path.dirname(file), exist_ok=True)
-        if os.path.exists(file):
-            with open(file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        logs.append({"model": model, "prompt": prompt, "resp_content": resp_content, "resp_type": resp_type, "resp": resp, "message": message})
-        with open(file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=4)
+        offsets = _get_index(file)
+        key = _cache_key(prompt, resp_type)
+        record = {"key": key, "model": model, "prompt": prompt, "resp_content": resp_content, "resp_type": resp_type, "resp": resp, "message": message}
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with open(file, 'ab') as f:
+            offset = f.tell()
+            f.write(line)
+        offsets.setdefault(key, offset)  # keep the first hit, same as the old linear scan
+        _INDEX[file]["size"] = offset + len(line)
 
 def _load_cache(prompt, resp_type, log_title):
     with LOCK:
-        file = os.path.join(GPT_LOG_FOLDER, f"{log_title}.json")
-        if os.path.exists(file):
+        file = _log_file(log_title)
+        offset = _get_index(file).get(_cache_key(prompt, resp_type))
+        if offset is None:
+            return False
+        with open(file, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())["resp"]
+
+def export_gpt_log(log_title=None):
+    """Export JSONL cache logs to the human-readable `<log_title>.json` array format"""
+    with LOCK:
+        if not os.path.isdir(GPT_LOG_FOLDER):
+            return
+        titles = [log_title] if log_title else [f[:-len('.jsonl')] for f in os.listdir(GPT_LOG_FOLDER) if f.endswith('.jsonl')]
+        for title in titles:
+            file = _log_file(title)
+            if not os.path.exists(file):
+                continue
             with open(file, 'r', encoding='utf-8') as f:
-                for item in json.load(f):
-                    if item["prompt"] == prompt and item["resp_type"] == resp_type:
-                        return item["resp"]
-        return False
+                logs = [json.loads(line) for line in f if line.strip()]
+            for item in logs:
+                item.pop("key", None)
+            with open(os.path.join(GPT_LOG_FOLDER, f"{title}.json"), 'w', encoding='utf-8') as f:
+                json.dump(logs, f, ensure_ascii=False, indent=4)
+
+# ------------
+# shared clients
+# ------------
+# One client per (api key, base_url) keeps a pooled keep-alive connection set
+# for every thread. Async clients are bound to their event loop, so they are
+# kept per loop. SDK retries are off: 429s and timeouts must reach the
+# adaptive limiter, retries happen in except_handler.
+
+_CLIENTS = {}
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()  # event loop -> {(api key, base_url): AsyncOpenAI}
+
+def get_client(base_url):
+    api_key = load_key("api.key")
+    with LOCK:
+        client = _CLIENTS.get((api_key, base_url))
+        if client is None:
+            client = _CLIENTS[(api_key, base_url)] = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        return client
+
+def get_async_client(base_url):
+    api_key = load_key("api.key")
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    if (api_key, base_url) not in clients:
+        clients[(api_key, base_url)] = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+    return clients[(api_key, base_url)]
 
 # ------------
 # ask gpt once
 # ------------
 
-@except_handler("GPT request failed", retry=5)
-def ask_gpt(prompt, resp_type=None, valid_def=None, log_title="default"):
+def _api_settings():
     if not load_key("api.key"):
         raise ValueError("API key is not set")
-    # check cache
-    cached = _load_cache(prompt, resp_type, log_title)
-    if cached:
-        rprint("use cache response")
-        return cached
-
     model = load_key("api.model")
     base_url = load_key("api.base_url")
     if 'ark' in base_url:
         base_url = "https://ark.cn-beijing.volces.com/api/v3" # huoshan base url
     elif 'v1' not in base_url:
         base_url = base_url.strip('/') + '/v1'
-    client = OpenAI(api_key=load_key("api.key"), base_url=base_url)
-    response_format = {"type": "json_object"} if resp_type == "json" and load_key("api.llm_support_json") else None
+    return model, base_url
 
-    messages = [{"role": "user", "content": prompt}]
+def _cached_response(model, base_url, prompt, resp_type, log_title):
+    """Look up the run log, then the shared cache; None means the request has to go out"""
+    cached = _load_cache(prompt, resp_type, log_title)
+    if cached:
+        rprint("use cache response")
+        llm_cache.record("log_hits")
+        llm_metrics.record_call(log_title, 0, cache="log")
+        return cached
+
+    shared = llm_cache.shared_cache_get(model, base_url, prompt, resp_type)
+    if shared is not None:
+        rprint("use shared cache response")
+        llm_cache.record("shared_hits")
+        llm_metrics.record_call(log_title, 0, cache="shared")
+        _save_cache(model, prompt, None, resp_type, shared, log_title=log_title)
+        return shared
+    llm_cache.record("misses")
+    return None
 
+def _request_params(model, prompt, resp_type, stream=False):
+    response_format = {"type": "json_object"} if resp_type == "json" and load_key("api.llm_support_json") else None
+    messages = [{"role": "user", "content": prompt}]
     params = dict(
         model=model,
         messages=messages,
         response_format=response_format,
         timeout=300
     )
-    resp_raw = client.chat.completions.create(**params)
+    if stream:
+        params.update(stream=True, stream_options={"include_usage": True})
+    return params
 
+def _total_tokens(resp_raw):
+    usage = getattr(resp_raw, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+def _handle_response(model, base_url, prompt, resp_type, resp_content, valid_def, log_title):
     # process and return full result
-    resp_content = resp_raw.choices[0].message.content
     if resp_type == "json":
         resp = json_repair.loads(resp_content)
     else:
@@ -84,8 +182,139 @@ def ask_gpt(prompt, resp_type=None, valid_def=None, log_title="default"):
             raise ValueError(f"❎ API response error: {valid_resp['message']}")
 
     _save_cache(model, prompt, resp_content, resp_type, resp, log_title=log_title)
+    llm_cache.shared_cache_put(model, base_url, prompt, resp_type, resp)
     return resp
 
+# ------------
+# streaming json
+# ------------
+# With api.stream_json the response is streamed and, every STREAM_CHECK_CHARS,
+# the partial JSON is repaired and handed to the caller's `stream_check`. If it
+# returns an error message the stream is closed at once and the request is
+# re-sent right away (up to STREAM_ABORT_RETRIES times) instead of waiting for
+# the whole completion to fail validation.
+
+STREAM_CHECK_CHARS = 200
+STREAM_ABORT_RETRIES = 2
+
+class StreamAborted(ValueError):
+    def __init__(self, message, content):
+        super().__init__(message)
+        self.content = content
+
+class StreamCollector:
+    """Accumulate streamed chunks; exposes `content` and `usage` like a finished response"""
+    def __init__(self, resp_type, stream_check=None):
+        self.resp_type = resp_type
+        self.stream_check = stream_check
+        self.content = ''
+        self.usage = None
+        self._checked = 0
+
+    def feed(self, chunk):
+        if getattr(chunk, "usage", None):
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return
+        self.content += chunk.choices[0].delta.content or ''
+        if self.stream_check and len(self.content) - self._checked >= STREAM_CHECK_CHARS:
+            self._checked = len(self.content)
+            partial = json_repair.loads(self.content) if self.resp_type == "json" else self.content
+            error = self.stream_check(partial)
+            if error:
+                raise StreamAborted(error, self.content)
+
+def _on_stream_aborted(e, attempt, model, prompt, resp_type, log_title):
+    _save_cache(model, prompt, e.content, resp_type, None, log_title="error", message=str(e))
+    if attempt == STREAM_ABORT_RETRIES:
+        raise e
+    rprint(f"[yellow]Response stream for {log_title} aborted early: {e}, retrying now[/yellow]")
+
+# ------------
+# ask gpt
+# ------------
+# ask_gpt and ask_gpt_async share everything in _GptRequest and only differ
+# in how the request is sent (sync client / async client and limiter).
+
+class _GptRequest:
+    """Settings, cache lookup, metrics, token usage and result handling of one ask_gpt call"""
+    def __init__(self, prompt, resp_type, valid_def, log_title, stream_check):
+        self.prompt, self.resp_type, self.valid_def, self.log_title, self.stream_check = prompt, resp_type, valid_def, log_title, stream_check
+        self.model, self.base_url = _api_settings()
+        self.cached = _cached_response(self.model, self.base_url, prompt, resp_type, log_title)
+        self.stream = load_key("api.stream_json")
+        self.params = _request_params(self.model, prompt, resp_type, self.stream)
+        self.resp_raw = None
+
+    def attempts(self):
+        return range(STREAM_ABORT_RETRIES + 1)
+
+    def begin(self, call):
+        """Call once a limiter slot is held; returns the collector to feed chunks to when streaming"""
+        call["start"] = time.time()  # latency without the wait for a limiter slot
+        if self.stream:
+            call["resp_raw"] = self.resp_raw = StreamCollector(self.resp_type, self.stream_check)
+        return self.resp_raw
+
+    def received(self, call, ticket, resp_raw=None):
+        """Record the finished response, `resp_raw` is the completion when not streaming"""
+        if resp_raw is not None:
+            call["resp_raw"] = self.resp_raw = resp_raw
+        ticket["used"] = _total_tokens(self.resp_raw)
+
+    def result(self):
+        resp_content = self.resp_raw.content if self.stream else self.resp_raw.choices[0].message.content
+        return _handle_response(self.model, self.base_url, self.prompt, self.resp_type, resp_content, self.valid_def, self.log_title)
+
+    def aborted(self, e, attempt):
+        _on_stream_aborted(e, attempt, self.model, self.prompt, self.resp_type, self.log_title)
+
+@except_handler("GPT request failed", retry=5)
+def ask_gpt(prompt, resp_type=None, valid_def=None, log_title="default", stream_check=None):
+    request = _GptRequest(prompt, resp_type, valid_def, log_title, stream_check)
+    if request.cached is not None:
+        return request.cached
+
+    client = get_client(request.base_url)
+    for attempt in request.attempts():
+        try:
+            with llm_metrics.track(log_title) as call:
+                with get_limiter().request(prompt) as ticket:
+                    collector = request.begin(call)
+                    if request.stream:
+                        with client.chat.completions.create(**request.params) as chunks:
+                            for chunk in chunks:
+                                collector.feed(chunk)
+                        request.received(call, ticket)
+                    else:
+                        request.received(call, ticket, client.chat.completions.create(**request.params))
+                return request.result()
+        except StreamAborted as e:
+            request.aborted(e, attempt)
+
+@except_handler("GPT request failed", retry=5)
+async def ask_gpt_async(prompt, resp_type=None, valid_def=None, log_title="default", stream_check=None):
+    """Same as ask_gpt on asyncio, requests in flight are bounded by the adaptive limiter"""
+    request = _GptRequest(prompt, resp_type, valid_def, log_title, stream_check)
+    if request.cached is not None:
+        return request.cached
+
+    client = get_async_client(request.base_url)
+    for attempt in request.attempts():
+        try:
+            with llm_metrics.track(log_title) as call:
+                async with get_limiter().request_async(prompt) as ticket:
+                    collector = request.begin(call)
+                    if request.stream:
+                        async with await client.chat.completions.create(**request.params) as chunks:
+                            async for chunk in chunks:
+                                collector.feed(chunk)
+                        request.received(call, ticket)
+                    else:
+                        request.received(call, ticket, await client.chat.completions.create(**request.params))
+                return request.result()
+        except StreamAborted as e:
+            request.aborted(e, attempt)
 
 if __name__ == '__main__':
     from rich import print as rprint
@@ -1,3 +1,5 @@
+import os
+import time
 from ruamel.yaml import YAML
 import threading
 
@@ -7,14 +9,63 @@ lock = threading.Lock()
 yaml = YAML()
 yaml.preserve_quotes = True
 
+# -----------------------
+# cached config snapshot
+# -----------------------
+# `load_key` is called in hot loops, so the parsed config is kept in memory and
+# only re-read when the file's mtime/size changes (e.g. edited by hand or by st).
+# The file is stat'ed at most once per STAT_INTERVAL seconds; update_key in this
+# process refreshes the snapshot right away.
+# The snapshot is converted once from ruamel's commented containers to plain
+# dict/list, which are cheap to copy; get_joiner's language sets are built
+# per snapshot too.
+
+STAT_INTERVAL = 1.0
+_snapshot = {"stamp": None, "data": None, "joiner": None, "checked_at": 0.0}
+
+def _to_plain(value):
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_plain(v) for v in value]
+    return value
+
+def _copy_plain(value):
+    if isinstance(value, dict):
+        return {k: _copy_plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_plain(v) for v in value]
+    return value
+
+def _set_snapshot(data, stamp):
+    plain = _to_plain(data)
+    _snapshot["data"], _snapshot["stamp"], _snapshot["checked_at"] = plain, stamp, time.monotonic()
+    _snapshot["joiner"] = (frozenset(plain.get('language_split_with_space') or ()), frozenset(plain.get('language_split_without_space') or ()))
+
+def _file_stamp():
+    st = os.stat(CONFIG_PATH)
+    return (st.st_mtime_ns, st.st_size)
+
+def _read_config():
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as file:
+        return yaml.load(file)
+
+def _get_config():
+    with lock:
+        now = time.monotonic()
+        if _snapshot["data"] is None or now - _snapshot["checked_at"] >= STAT_INTERVAL:
+            stamp = _file_stamp()
+            _snapshot["checked_at"] = now
+            if _snapshot["stamp"] != stamp:
+                _set_snapshot(_read_config(), stamp)
+        return _snapshot["data"]
+
 # -----------------------
 # load & update config
 # -----------------------
 
 def load_key(key):
-    with lock:
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as file:
-            data = yaml.load(file)
+    data = _get_config()
 
     keys = key.split('.')
     value = data
@@ -23,12 +74,12 @@ def load_key(key):
             value = value[k]
         else:
             raise KeyError(f"Key '{k}' not found in configuration")
-    return value
+    # hand out copies of containers so callers can't mutate the shared snapshot
+    return _copy_plain(value) if isinstance(value, (dict, list)) else value
 
 def update_key(key, new_value):
     with lock:
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as file:
-            data = yaml.load(file)
+        data = _read_config()
 
         keys = key.split('.')
         current = data
@@ -42,18 +93,43 @@ def update_key(key, new_value):
             current[keys[-1]] = new_value
             with open(CONFIG_PATH, 'w', encoding='utf-8') as file:
                 yaml.dump(data, file)
+            _set_snapshot(data, _file_stamp())
             return True
         else:
             raise KeyError(f"Key '{keys[-1]}' not found in configuration")
         
 # basic utils
 def get_joiner(language):
-    if language in load_key('language_split_with_space'):
+    _get_config()  # refresh the snapshot if config.yaml changed
+    with_space, without_space = _snapshot["joiner"]
+    if language in with_space:
         return " "
-    elif language in load_key('language_split_without_space'):
+    elif language in without_space:
         return ""
     else:
         raise ValueError(f"Unsupported language code: {language}")
 
+def benchmark_load_key(n=10000, key='subtitle.max_length'):
+    """Compare uncached parsing against the cached snapshot over `n` calls"""
+    start = time.perf_counter()
+    for _ in range(n):
+        value = _read_config()
+        for k in key.split('.'):
+            value = value[k]
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n):
+        load_key(key)
+    cached = time.perf_counter() - start
+    print(f"load_key x{n}: uncached {uncached:.3f}s ({uncached / n * 1e6:.1f}us/call), "
+          f"cached {cached:.3f}s ({cached / n * 1e6:.1f}us/call), {uncached / cached:.0f}x faster")
+
+    start = time.perf_counter()
+    for _ in range(n):
+        get_joiner('en')
+    print(f"get_joiner x{n}: {(time.perf_counter() - start) / n * 1e6:.1f}us/call")
+
 if __name__ == "__main__":
     print(load_key('language_split_with_space'))
+    benchmark_load_key()
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import hashlib
+from threading import Lock
+from rich import print as rprint
+from core.utils.config_utils import load_key
+
+# ------------
+# cross-video llm response cache
+# ------------
+# Content-addressed by hash(model, base_url, prompt, resp_type) and kept outside
+# `output/`, so it survives cleanup and is shared by re-runs and batch jobs.
+
+LOCK = Lock()
+STATS = {"log_hits": 0, "shared_hits": 0, "misses": 0}
+_evicted = False
+
+def _cache_dir():
+    return load_key("llm_cache.dir")
+
+def _cache_path(model, base_url, prompt, resp_type):
+    key = hashlib.sha256(json.dumps([model, base_url, prompt, resp_type], ensure_ascii=False).encode('utf-8')).hexdigest()
+    return os.path.join(_cache_dir(), key[:2], f"{key}.json")
+
+def shared_cache_get(model, base_url, prompt, resp_type):
+    if not load_key("llm_cache.enabled"):
+        return None
+    _evict_once()
+    path = _cache_path(model, base_url, prompt, resp_type)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            resp = json.load(f)["resp"]
+    except (OSError, ValueError, KeyError):
+        return None
+    try:
+        os.utime(path)  # refresh mtime so eviction is least-recently-used
+    except OSError:
+        pass
+    return resp
+
+def shared_cache_put(model, base_url, prompt, resp_type, resp):
+    if not load_key("llm_cache.enabled"):
+        return
+    path = _cache_path(model, base_url, prompt, resp_type)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"model": model, "prompt": prompt, "resp_type": resp_type, "resp": resp}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def record(event):
+    with LOCK:
+        STATS[event] += 1
+
+# ------------
+# eviction
+# ------------
+
+def _evict_once():
+    global _evicted
+    with LOCK:
+        if _evicted:
+            return
+        _evicted = True
+    evict_shared_cache()
+
+def evict_shared_cache():
+    """Drop entries older than `max_age_days`, then the least recently used ones until under `max_size_mb`"""
+    cache_dir = _cache_dir()
+    if not os.path.isdir(cache_dir):
+        return
+    max_age = load_key("llm_cache.max_age_days") * 86400
+    max_size = load_key("llm_cache.max_size_mb") * 1024 * 1024
+    now = time.time()
+    entries, removed = [], 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime > max_age:
+                os.remove(path); removed += 1
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        os.remove(path); removed += 1
+        total -= size
+    if removed:
+        rprint(f"[blue]🧹 Evicted {removed} entries from LLM cache `{cache_dir}`[/blue]")
+
+def print_cache_stats():
+    with LOCK:
+        hits = STATS["log_hits"] + STATS["shared_hits"]
+        total = hits + STATS["misses"]
+        if not total:
+            return
+        rprint(f"[cyan]💾 LLM cache: {hits}/{total} hits ({hits / total:.0%}), "
+               f"{STATS['log_hits']} from run log, {STATS['shared_hits']} from shared cache, {STATS['misses']} misses[/cyan]")
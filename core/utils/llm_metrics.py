@@ -0,0 +1,111 @@
+import os
+import json
+import time
+from threading import Lock
+from contextlib import contextmanager
+from rich.table import Table
+from rich.console import Console
+from core.utils.config_utils import load_key
+from core.utils.models import _LLM_METRICS
+from core.utils.rate_limiter import get_limiter
+
+# ------------
+# per-call llm metrics
+# ------------
+# Every ask_gpt attempt appends one JSON line to the run's metrics file:
+# latency, prompt/cached/completion tokens, cache source and error. A failed
+# attempt is what except_handler retries, so errors are counted as retries.
+# cached_tokens is what the provider served from its prompt cache:
+# OpenAI-style `prompt_tokens_details.cached_tokens`, or DeepSeek-style
+# `prompt_cache_hit_tokens`. Providers without prompt caching report 0.
+
+LOCK = Lock()
+
+def _usage_counts(usage):
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+        "cached_tokens": cached or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+    }
+
+def record_call(log_title, latency, resp_raw=None, cache=None, error=None):
+    record = {"time": time.time(), "log_title": log_title, "latency": round(latency, 3), "cache": cache,
+              "error": f"{type(error).__name__}: {error}"[:200] if error else None,
+              **_usage_counts(getattr(resp_raw, "usage", None))}
+    with LOCK:
+        os.makedirs(os.path.dirname(_LLM_METRICS), exist_ok=True)
+        with open(_LLM_METRICS, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+@contextmanager
+def track(log_title):
+    """Record one request attempt; set `call["start"]` once the request really goes out and `call["resp_raw"]` on response"""
+    call = {"start": time.time(), "resp_raw": None}
+    try:
+        yield call
+    except Exception as e:
+        record_call(log_title, time.time() - call["start"], call["resp_raw"], error=e)
+        raise
+    record_call(log_title, time.time() - call["start"], call["resp_raw"])
+
+# ------------
+# summary
+# ------------
+
+def summarize_metrics(path=_LLM_METRICS):
+    """Aggregate the metrics file by log_title"""
+    summary = {}
+    if not os.path.exists(path):
+        return summary
+    with LOCK, open(path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    for record in records:
+        entry = summary.setdefault(record["log_title"], {"calls": 0, "cache_hits": 0, "retries": 0, "latency": 0.0,
+                                                         "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0})
+        entry["calls"] += 1
+        if record["cache"]:
+            entry["cache_hits"] += 1
+            continue
+        if record["error"]:
+            entry["retries"] += 1
+        else:
+            entry["latency"] += record["latency"]  # averaged over successful requests only
+        for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+            entry[key] += record[key]
+    return summary
+
+def _cost(entry):
+    """Cost from the llm_price per-million-token prices, cached input billed at its own price"""
+    prices = load_key("llm_price")
+    uncached = entry["prompt_tokens"] - entry["cached_tokens"]
+    return (uncached * prices["input"] + entry["cached_tokens"] * prices["cached_input"] + entry["completion_tokens"] * prices["output"]) / 1e6
+
+def print_llm_metrics(path=_LLM_METRICS):
+    summary = summarize_metrics(path)
+    if not summary:
+        return
+    show_cost = any(load_key("llm_price").values())
+    table = Table(title="LLM Usage by Step")
+    columns = ["step", "calls", "cache hits", "retries", "avg latency", "prompt", "cached", "completion"] + (["cost"] if show_cost else [])
+    for column in columns:
+        table.add_column(column)
+    totals = {"calls": 0, "cache_hits": 0, "retries": 0, "latency": 0.0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+    for log_title, entry in sorted(summary.items()) + [("total", totals)]:
+        if log_title != "total":
+            for key in totals:
+                totals[key] += entry[key]
+        succeeded = entry["calls"] - entry["cache_hits"] - entry["retries"]
+        row = [log_title, str(entry["calls"]), str(entry["cache_hits"]), str(entry["retries"]),
+               f"{entry['latency'] / succeeded:.2f}s" if succeeded else "-",
+               str(entry["prompt_tokens"]), str(entry["cached_tokens"]), str(entry["completion_tokens"])]
+        table.add_row(*row + ([f"{_cost(entry):.4f}"] if show_cost else []))
+    Console().print(table)
+    limiter = get_limiter().metrics()
+    avg_latency = f"{limiter['avg_latency']:.2f}s" if limiter['avg_latency'] is not None else "-"
+    Console().print(f"[cyan]🚦 Rate limiter: concurrency limit {limiter['concurrency_limit']}, {limiter['ok']} ok, {limiter['rate_limited']} rate limited, "
+                    f"{limiter['timeout']} timeouts, {limiter['error']} errors, avg latency {avg_latency}[/cyan]")
+    Console().print(f"[cyan]📊 Per-call LLM metrics saved to → `{path}`[/cyan]")
@@ -7,6 +7,7 @@ _4_2_TRANSLATION = "output/log/translation_results.csv"
 _5_SPLIT_SUB = "output/log/translation_results_for_subtitles.csv"
 _5_REMERGED = "output/log/translation_results_remerged.csv"
 _8_1_AUDIO_TASK = "output/audio/tts_tasks.csv"
+_LLM_METRICS = "output/log/llm_metrics.jsonl"
 
 # Audio files
 _OUTPUT_DIR = "output"
@@ -17,6 +18,7 @@ _BACKGROUND_AUDIO_FILE = "output/audio/background.wav"
 _AUDIO_REFERS_DIR = "output/audio/refers"
 _AUDIO_SEGS_DIR = "output/audio/segs"
 _AUDIO_TMP_DIR = "output/audio/tmp"
+_AUDIO_ASR_CHECKPOINT_DIR = "output/audio/asr_checkpoints"
 
 __all__ = [
     "_2_CLEANED_CHUNKS",
@@ -27,6 +29,7 @@ __all__ = [
     "_5_SPLIT_SUB",
     "_5_REMERGED",
     "_8_1_AUDIO_TASK",
+    "_LLM_METRICS",
     "_OUTPUT_DIR",
     "_AUDIO_DIR",
     "_RAW_AUDIO_FILE",
@@ -34,5 +37,6 @@ __all__ = [
     "_BACKGROUND_AUDIO_FILE",
     "_AUDIO_REFERS_DIR",
     "_AUDIO_SEGS_DIR",
-    "_AUDIO_TMP_DIR"
+    "_AUDIO_TMP_DIR",
+    "_AUDIO_ASR_CHECKPOINT_DIR"
 ]
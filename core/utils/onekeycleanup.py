@@ -1,6 +1,8 @@
 import os
 import glob
 from core._1_ytdlp import find_video_files
+from core.utils.ask_gpt import export_gpt_log
+from core.utils.config_utils import load_key
 import shutil
 
 def cleanup(history_dir="history"):
@@ -27,6 +29,10 @@ def cleanup(history_dir="history"):
     for file in glob.glob("output/log/*"):
         move_file(file, log_dir)
 
+    # Export readable gpt logs before moving
+    if load_key("gpt_log_export"):
+        export_gpt_log()
+
     # Move gpt_log files
     for file in glob.glob("output/gpt_log/*"):
         move_file(file, gpt_log_dir)
@@ -0,0 +1,187 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from rich import print as rprint
+from core.utils.config_utils import load_key
+from core.utils.token_counter import count_tokens
+
+# ------------
+# adaptive limiter for llm requests
+# ------------
+# AIMD on the number of requests in flight: +1 per window of successes
+# that ran at the limit (an unsaturated limit says nothing about capacity),
+# halve on 429 / timeout (at most once per second), and hold new requests
+# back for Retry-After. An optional token bucket caps tokens per minute;
+# it is charged with a local token count up front and corrected with the
+# real usage.
+
+WINDOW = 60  # seconds of history for throughput metrics
+
+class AdaptiveLimiter:
+    def __init__(self, initial, max_concurrency, tpm_limit=0, min_concurrency=1):
+        self._cond = threading.Condition()
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(max_concurrency, initial)
+        self.limit = float(initial)
+        self.in_flight = 0
+        self.tpm_limit = tpm_limit
+        self._tokens = float(tpm_limit)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._decreased_at = 0.0
+        self._latency = None
+        self._history = deque()  # (finished at, tokens)
+        self.counts = {"ok": 0, "rate_limited": 0, "timeout": 0, "error": 0}
+
+    @staticmethod
+    def estimate_tokens(prompt):
+        return count_tokens(prompt)
+
+    # ------------
+    # acquire / release
+    # ------------
+
+    def _refill(self, now):
+        if self.tpm_limit:
+            self._tokens = min(self.tpm_limit, self._tokens + (now - self._refilled_at) * self.tpm_limit / 60)
+        self._refilled_at = now
+
+    def _try_acquire(self, tokens):
+        """Take a slot and `tokens` if possible, else return how long to wait before trying again"""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= int(self.limit):
+            return 0.05  # woken earlier by release
+        need = min(tokens, self.tpm_limit)  # a request larger than the bucket waits for a full bucket
+        if self.tpm_limit and self._tokens < need:
+            return (need - self._tokens) * 60 / self.tpm_limit
+        self.in_flight += 1
+        if self.tpm_limit:
+            self._tokens -= tokens
+        return 0
+
+    def acquire(self, tokens=0):
+        with self._cond:
+            while (wait := self._try_acquire(tokens)) > 0:
+                self._cond.wait(timeout=wait)
+
+    async def acquire_async(self, tokens=0):
+        while True:
+            with self._cond:
+                wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, 0.05))
+
+    def release(self, outcome, latency, estimated=0, used=None, retry_after=None):
+        with self._cond:
+            now = time.monotonic()
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            self.counts[outcome] += 1
+            if used is not None and self.tpm_limit:
+                self._tokens += estimated - used
+            self._history.append((now, used if used is not None else estimated))
+
+            if outcome == "ok":
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                if saturated:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            elif outcome in ("rate_limited", "timeout"):
+                if now - self._decreased_at > 1:
+                    self._decreased_at = now
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                    rprint(f"[yellow]LLM {outcome.replace('_', ' ')}, concurrency limit -> {int(self.limit)}[/yellow]")
+                if outcome == "rate_limited":
+                    self._paused_until = max(self._paused_until, now + (retry_after or 1))
+            self._cond.notify_all()
+
+    @staticmethod
+    def classify(error):
+        """Map a request exception to (outcome, retry_after seconds or None)"""
+        status = getattr(error, "status_code", None)
+        if status == 429 or type(error).__name__ == "RateLimitError":
+            headers = getattr(getattr(error, "response", None), "headers", None) or {}
+            try:
+                return "rate_limited", float(headers.get("retry-after"))
+            except (TypeError, ValueError):
+                return "rate_limited", None
+        if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+            return "timeout", None
+        return "error", None
+
+    @contextmanager
+    def request(self, prompt):
+        """Hold a slot around one sync request; set `ticket["used"]` to the real token usage when known"""
+        ticket = {"estimated": self.estimate_tokens(prompt), "used": None}
+        self.acquire(ticket["estimated"])
+        start = time.monotonic()
+        try:
+            yield ticket
+        except Exception as e:
+            outcome, retry_after = self.classify(e)
+            self.release(outcome, time.monotonic() - start, ticket["estimated"], retry_after=retry_after)
+            raise
+        self.release("ok", time.monotonic() - start, ticket["estimated"], ticket["used"])
+
+    @asynccontextmanager
+    async def request_async(self, prompt):
+        ticket = {"estimated": self.estimate_tokens(prompt), "used": None}
+        await self.acquire_async(ticket["estimated"])
+        start = time.monotonic()
+        try:
+            yield ticket
+        except Exception as e:
+            outcome, retry_after = self.classify(e)
+            self.release(outcome, time.monotonic() - start, ticket["estimated"], retry_after=retry_after)
+            raise
+        self.release("ok", time.monotonic() - start, ticket["estimated"], ticket["used"])
+
+    # ------------
+    # metrics
+    # ------------
+
+    def metrics(self):
+        with self._cond:
+            now = time.monotonic()
+            while self._history and now - self._history[0][0] > WINDOW:
+                self._history.popleft()
+            return {
+                "concurrency_limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "requests_per_min": len(self._history) * 60 / WINDOW,
+                "tokens_per_min": sum(tokens for _, tokens in self._history) * 60 / WINDOW,
+                "avg_latency": round(self._latency, 3) if self._latency is not None else None,
+                **self.counts,
+            }
+
+_LIMITER = None
+_LIMITER_LOCK = threading.Lock()
+
+def get_limiter():
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            max_workers = load_key("max_workers")
+            _LIMITER = AdaptiveLimiter(
+                initial=max_workers,
+                # max_workers: 1 means a local LLM that can only serve one request, never grow past it
+                max_concurrency=1 if max_workers == 1 else load_key("rate_limit.max_concurrency"),
+                tpm_limit=load_key("rate_limit.tpm_limit"),
+            )
+        return _LIMITER
+
+def get_llm_workers():
+    """Thread pool size for LLM calls, the limiter gates how many run at once so pools must not cap it below its ceiling"""
+    return get_limiter().max_concurrency
+
+if __name__ == '__main__':
+    limiter = AdaptiveLimiter(initial=4, max_concurrency=16, tpm_limit=6000)
+    for _ in range(20):
+        with limiter.request("x" * 400) as ticket:
+            ticket["used"] = 120
+    rprint(limiter.metrics())
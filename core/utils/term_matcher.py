@@ -0,0 +1,72 @@
+from collections import deque
+
+PLURAL_SUFFIXES = ('s', 'es')
+
+# ------------
+# multi-pattern term matching
+# ------------
+
+def _is_cjk(char):
+    code = ord(char)
+    return 0x3040 <= code <= 0x30FF or 0x3400 <= code <= 0x9FFF or 0xAC00 <= code <= 0xD7A3 or 0xF900 <= code <= 0xFAFF
+
+def _is_word_char(char):
+    # CJK scripts have no spaces between words, so they never form a boundary
+    return (char.isalnum() or char == '_') and not _is_cjk(char)
+
+class TermMatcher:
+    """Case-insensitive Aho-Corasick automaton, finds all terms in one pass over the text"""
+
+    def __init__(self, patterns):
+        self.patterns = [str(p).lower() for p in patterns]
+        self.goto, self.fail, self.out = [{}], [0], [[]]
+        for pid, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                if char not in self.goto[node]:
+                    self.goto.append({}); self.fail.append(0); self.out.append([])
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.out[node].append(pid)
+
+        # breadth-first failure links, each node also reports the outputs of its fallback
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def _at_word_boundary(self, text, start, end, pattern):
+        if start > 0 and _is_word_char(pattern[0]) and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(pattern[-1]) and _is_word_char(text[end]):
+            # still accept plain plurals, e.g. "GPU" in "GPUs"
+            for suffix in PLURAL_SUFFIXES:
+                stop = end + len(suffix)
+                if text.startswith(suffix, end) and (stop == len(text) or not _is_word_char(text[stop])):
+                    return True
+            return False
+        return True
+
+    def find(self, text):
+        """Return the set of pattern indices occurring in `text` as whole words"""
+        text = text.lower()
+        found, node = set(), 0
+        for i, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for pid in self.out[node]:
+                if pid not in found:
+                    pattern = self.patterns[pid]
+                    if self._at_word_boundary(text, i + 1 - len(pattern), i + 1, pattern):
+                        found.add(pid)
+        return found
@@ -0,0 +1,33 @@
+from functools import lru_cache
+from core.utils.config_utils import load_key
+
+# ------------
+# local llm token counting
+# ------------
+# tiktoken is optional; without it (or for models it does not know) a
+# chars/4 estimate is used, which is close enough for budgeting.
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+@lru_cache(maxsize=8)
+def _get_encoding(model):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        try:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            return None  # encoding files not downloadable here
+    except Exception:
+        return None
+
+def count_tokens(text, model=None):
+    encoding = _get_encoding(model or load_key("api.model"))
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
@@ -21,6 +21,8 @@ torch.load = patched_load
 
 from core.st_utils.imports_and_utils import *
 from core import *
+from core.utils.llm_cache import print_cache_stats
+from core.utils.llm_metrics import print_llm_metrics
 
 # SET PATH
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -63,19 +65,24 @@ def text_processing_section():
 
 def process_text():
     only_transcribe = load_key("subtitle.only_transcribe")
+    stream_translate = load_key("stream_translate") and not only_transcribe
 
     with st.spinner(t("Using Whisper for transcription...")):
         _2_asr.transcribe()
     with st.spinner(t("Splitting long sentences...")):
         _3_1_split_nlp.split_by_spacy()
-        _3_2_split_meaning.split_sentences_by_meaning()
+        if not stream_translate:
+            _3_2_split_meaning.split_sentences_by_meaning()
 
     if not only_transcribe:
         with st.spinner(t("Summarizing and translating...")):
             _4_1_summarize.get_summary()
             if load_key("pause_before_translate"):
                 input(t("⚠️ PAUSE_BEFORE_TRANSLATE. Go to `output/log/terminology.json` to edit terminology. Then press ENTER to continue..."))
-            _4_2_translate.translate_all()
+            if stream_translate:
+                _4_2_translate.translate_all_streaming()
+            else:
+                _4_2_translate.translate_all()
         with st.spinner(t("Processing and aligning subtitles...")):
             _5_split_sub.split_for_sub_main()
 
@@ -84,6 +91,8 @@ def process_text():
     with st.spinner(t("Merging subtitles to video...")):
         _7_sub_into_vid.merge_subtitles_to_video()
 
+    print_cache_stats()
+    print_llm_metrics()
     st.success(t("Subtitle processing complete! 🎉"))
     st.balloons()
 
@@ -127,6 +136,7 @@ def process_audio():
     with st.spinner(t("Merge dubbing to the video")):
         _12_dub_to_vid.merge_video_audio()
 
+    print_llm_metrics()
     st.success(t("Audio processing complete! 🎇"))
     st.balloons()
 
@@ -0,0 +1,79 @@
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from core._3_2_split_meaning import find_split_positions
+
+# find_split_positions must cut exactly where the original exhaustive search did
+
+SPLIT_CORPUS = [
+    ("Which makes no sense to the... average guy who always pushes the character creation slider all the way to the right.",
+     "Which makes no sense to the... average guy [br] who always pushes the character creation slider all the way to the right.", " "),
+    ("So in the same frame, right there, almost in the exact same spot on the ice, Brown has committed himself, whereas McDavid has not.",
+     "So in the same frame, right there, almost in the exact same spot on the ice,[br] Brown has committed himself, whereas McDavid has not.", " "),
+    ("He was really early on in the development of neural networks with GPUs and of course a creator of Coursera.",
+     "He was really early on in the development of neural networks with GPUs [br] and of course a creator of Coursera", " "),
+    ("And show the specific differences that make a difference between a breakaway that results in a goal in the NHL versus one that doesn't.",
+     "And show the specific differences that make a difference [br] between a breakaway that results in a goal [br] in the NHL versus one that doesn't.", " "),
+    ("Well I think the model is great because it was trained on a lot of data but you know it still makes mistakes sometimes.",
+     "Well, I think the model is great because it was trained on a lot of data [br] but you know, it still makes mistakes sometimes.", " "),
+    ("我们今天要讲的是人工智能在医疗领域的应用以及它未来的发展方向",
+     "我们今天要讲的是人工智能在医疗领域的应用[br]以及它未来的发展方向", ""),
+    ("所以说这个模型的效果非常好但是它仍然会犯一些错误",
+     "所以说，这个模型的效果非常好[br]但是它仍然会犯一些错误", ""),
+]
+
+def legacy_find_split_positions(original, modified, joiner):
+    """The original search: score every cut point of the remaining sentence"""
+    split_positions, start = [], 0
+    parts = modified.split('[br]')
+    for i in range(len(parts) - 1):
+        max_similarity, best_split = 0, None
+        for j in range(start, len(original)):
+            left_similarity = SequenceMatcher(None, original[start:j], joiner.join(parts[i].split())).ratio()
+            if left_similarity > max_similarity:
+                max_similarity, best_split = left_similarity, j
+        if best_split is not None:
+            split_positions.append(best_split)
+            start = best_split
+    return split_positions
+
+@pytest.mark.parametrize("original, modified, joiner", SPLIT_CORPUS)
+def test_matches_legacy_search(original, modified, joiner):
+    assert find_split_positions(original, modified, joiner=joiner) == legacy_find_split_positions(original, modified, joiner)
+
+WORDS = ("the a model data we it is was really so and but of to in on that this you know like "
+         "network training GPU frame ice goal McDavid Coursera difference breakaway mistakes").split()
+
+def _llm_edit(words, rng):
+    """Rewrite a sentence the way the split model tends to: punctuation, casing, dropped or changed words"""
+    edited = []
+    for word in words:
+        roll = rng.random()
+        if roll < 0.05:
+            continue
+        if roll < 0.1:
+            word = rng.choice(WORDS)
+        elif roll < 0.2:
+            word += rng.choice(",.!?")
+        elif roll < 0.25:
+            word = word.capitalize()
+        edited.append(word)
+    return edited
+
+def _random_case(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(4, 40))]
+    original = ' '.join(words) + rng.choice(['', '.', '?'])
+    edited = _llm_edit(words, rng)
+    cuts = sorted(rng.sample(range(1, len(edited)), min(rng.randint(1, 3), len(edited) - 1))) if len(edited) > 1 else []
+    parts, last = [], 0
+    for cut in cuts + [len(edited)]:
+        parts.append(' '.join(edited[last:cut]))
+        last = cut
+    return original, rng.choice([' [br] ', '[br] ', ' [br]', '[br]']).join(parts)
+
+@pytest.mark.parametrize("seed", range(300))
+def test_random_matches_legacy_search(seed):
+    original, modified = _random_case(random.Random(seed))
+    assert find_split_positions(original, modified, joiner=' ') == legacy_find_split_positions(original, modified, ' ')